@@ -1,26 +1,48 @@
+from concurrent.futures import Future
+import html
 import os
-from io import BytesIO
 import re
-import shutil
-import tempfile
-import time
-from typing import Generator
+from typing import Callable, Generator
 
 import docker
 import docker.errors
 import streamlit as st
 import streamlit.components.v1 as components
-from docker.types import Mount
-from openai import OpenAI
-
-from layout import unified_iframe_html
-from models import ArtifactMetadata, artifact_selector
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from cache import ResponseCache
+from builds import BuildError, VueBuilder
+from candidates import Candidate, CandidateRace
+from chat import ChatLog
+from export import default_excludes, export_container_path, export_formats
+from history import build_messages
+from layout import inline_iframe_html, unified_iframe_html
+from llm import keep_warm, stream_chat
+from models import ArtifactMetadata, LLMBackend, artifact_selector, llm_backends
+from patching import PatchError, apply_response, with_full_code
+from prompts import full_file_prompt, patch_prompt, repair_prompt
+from readiness import ReadinessError, wait_until_ready
+from revisions import RevisionHistory
+from ports import PortExhaustedError
+from sandbox import Sandbox, SandboxCapacityError, SandboxLimits, SandboxPool
+from store import ArtifactStore
+from streaming import FenceParser
+from telemetry import telemetry
+from validation import validate_code
 
 
 # ------- SESSION STATE ------- #
 def init_session():
     if "messages" not in st.session_state:
-        st.session_state.messages = []
+        st.session_state.messages = ChatLog(
+            keep_code_turns=int(os.getenv("CHAT_KEEP_CODE_TURNS", 3))
+        )
+
+    if "revisions" not in st.session_state:
+        st.session_state.revisions = RevisionHistory(
+            keep_warm=int(os.getenv("REVISIONS_KEEP_WARM", 5))
+        )
 
     if "selectbox_disabled" not in st.session_state:
         st.session_state.selectbox_disabled = False
@@ -30,60 +52,111 @@ def disable_selector():
     st.session_state.selectbox_disabled = True
 
 
+def get_session_id() -> str:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+
+def reap_ended_sessions():
+    if Runtime.exists():
+        get_sandbox_pool().reap(Runtime.instance().is_active_session)
+
+
 # ------- DOCKER OPERATIONS ------- #
-def execute_docker(
-    host_path: str,
-    artifact_metadata: ArtifactMetadata,
-    container_path: str = "/home/runner/app",
-):
-    client = docker.from_env()
-    mount = Mount(target=container_path, source=host_path, type="bind", read_only=False)
+@st.cache_resource
+def get_artifact_store() -> ArtifactStore:
+    return ArtifactStore(
+        root=os.getenv(
+            "ARTIFACT_STORE_DIR", os.path.expanduser("~/.cache/llm-artifact/artifacts")
+        ),
+        max_bytes=int(os.getenv("ARTIFACT_STORE_MAX_MB", 512)) * 1024 * 1024,
+        max_age=float(os.getenv("ARTIFACT_STORE_MAX_AGE", 7 * 86400)),
+    )
+
+
+def env_or_none(name: str, default: str, cast: Callable):
+    # "0" or "" switches a limit off
+    value = os.getenv(name, default)
+    return cast(value) if value not in ("", "0") else None
+
+
+@st.cache_resource
+def get_sandbox_pool() -> SandboxPool:
+    pool = SandboxPool(
+        artifact_store=get_artifact_store(),
+        limits=SandboxLimits(
+            cpus=env_or_none("SANDBOX_CPUS", "1.0", float),
+            memory=env_or_none("SANDBOX_MEMORY", "1g", str),
+            pids=env_or_none("SANDBOX_PIDS", "256", int),
+            idle_ttl=env_or_none("SANDBOX_IDLE_TTL", "1800", float),
+            disconnect_grace=env_or_none("SANDBOX_DISCONNECT_GRACE", "300", float),
+            max_live=env_or_none("SANDBOX_MAX_LIVE", "32", int),
+        ),
+        builder=VueBuilder(
+            ArtifactStore(
+                root=os.getenv(
+                    "BUILD_CACHE_DIR",
+                    os.path.expanduser("~/.cache/llm-artifact/builds"),
+                ),
+                max_bytes=int(os.getenv("BUILD_CACHE_MAX_MB", 1024)) * 1024 * 1024,
+            )
+        ),
+    )
+    pool.start_supervisor(interval=float(os.getenv("SANDBOX_REAP_INTERVAL", 60)))
+    return pool
+
+
+def deploy_to_sandbox(
+    artifact_metadata: ArtifactMetadata, code: str, deployment: Future | None = None
+) -> Sandbox:
     try:
-        container = client.containers.run(
-            image=artifact_metadata.image_name,
-            mounts=[mount],
-            ports={str(artifact_metadata.container_port): artifact_metadata.host_port},
-            detach=True,
-            name=f"llm-artifact-{artifact_metadata.name}",
-        )
-        st.session_state["container_id"] = container.id
-        return container.id
-    except docker.errors.DockerException as e:
+        if deployment is not None:
+            sandbox = deployment.result()  # started while the response was streaming
+        else:
+            sandbox = get_sandbox_pool().deploy(
+                get_session_id(), artifact_metadata, code
+            )
+        return sandbox
+    except (
+        docker.errors.DockerException,
+        SandboxCapacityError,
+        PortExhaustedError,
+        BuildError,
+    ) as e:
         st.toast(str(e), icon="❌")
         print("❌ Error", str(e))
         st.stop()
 
 
-def stop_container(container_name: str):
-    client = docker.from_env()
-    try:
-        container = client.containers.get(container_name)
-        container.stop()
-        container.remove()
-        return f"Container '{container_name}' stopped and removed successfully."
-    except docker.errors.NotFound:
-        return f"Container '{container_name}' not found."
-    except Exception as e:
-        return f"Failed to stop the container: {str(e)}"
-
-
-def download_project_archive():
-    client = docker.from_env()
-    container_id = st.session_state.get("container_id")
-    if not container_id:
-        st.toast(
-            "Cannot download files at the moment, container_id not found.", icon="❌"
-        )
-        return
+def download_project_archive(
+    export_format: str, include_dependencies: bool, artifact_metadata: ArtifactMetadata
+):
+    # looked up on every click, the idle reaper or the LRU cap may have removed it
+    sandbox = get_sandbox_pool().get(get_session_id(), artifact_metadata)
+    digest = st.session_state.get("artifact_digest")
+    if sandbox is None or digest is None or sandbox.artifact_digest != digest:
+        return None
 
-    container = client.containers.get(container_id)
     try:
-        stream, stat = container.get_archive("/home/runner/app")
-        tar_data = BytesIO()
-        for chunk in stream:
-            tar_data.write(chunk)
-        tar_data.seek(0)
-        return tar_data
+        container = get_sandbox_pool().container(sandbox)
+        with telemetry.span(
+            "download",
+            artifact_type=artifact_metadata.name,
+            session=get_session_id(),
+            format=export_format,
+        ):
+            archive = export_container_path(
+                container,
+                "/home/runner/app",
+                export_format=export_format,
+                excludes=() if include_dependencies else default_excludes,
+            )
+        # download_button only takes plain file objects, hand it a read-only handle on the spool
+        with archive:
+            archive.rollover()
+            return os.fdopen(os.dup(archive.fileno()), "rb")
+    except docker.errors.NotFound:
+        return None  # removed between the lookup and the export
     except docker.errors.APIError as e:
         print(f"Error downloading project files from container: {e}")
     except Exception as e:
@@ -91,6 +164,17 @@ def download_project_archive():
 
 
 # ------- LLM OPERATIONS ------- #
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    return ResponseCache(
+        root=os.getenv(
+            "LLM_CACHE_DIR", os.path.expanduser("~/.cache/llm-artifact/responses")
+        ),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", 256)) * 1024 * 1024,
+        ttl=float(os.getenv("LLM_CACHE_TTL", 7 * 86400)),
+    )
+
+
 def get_code_group(llm_response: str, code_block: str) -> str | bool:
     code_match = re.search(rf"```{code_block}\s*(.*?)\s*```", llm_response, re.DOTALL)
     if not code_match:
@@ -102,34 +186,245 @@ def get_code_group(llm_response: str, code_block: str) -> str | bool:
     return code_match.group(1).strip()
 
 
-def call_llm(prompt: str, system_prompt: str) -> Generator[str, None, None]:
-    if st.session_state.get("local_mode", False):
-        client = OpenAI(base_url="http://localhost:11434/v1")
-        model = "llama3.2:3b"
-    else:
-        client = OpenAI(
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
+def get_backend() -> LLMBackend:
+    return llm_backends[
+        "local" if st.session_state.get("local_mode", False) else "remote"
+    ]
+
+
+def prepare_messages(
+    prompt: str,
+    system_prompt: str,
+    code_block: str,
+    backend: LLMBackend,
+    instructions: str = "",
+) -> list[dict]:
+    chat_log = st.session_state.get("messages")
+    chat_history = chat_log.history() if chat_log else []
+    if chat_history and chat_history[-1] == {"role": "user", "content": prompt}:
+        chat_history = chat_history[:-1]  # already appended by the main block
+
+    # per-request instructions ride on the user turn, so the system prompt stays a
+    # byte-identical prefix across the session that Ollama's KV cache and
+    # provider prompt caches reuse
+    messages, token_report = build_messages(
+        system_prompt=system_prompt,
+        chat_history=chat_history,
+        prompt=prompt + instructions,
+        code_block=code_block,
+        budget=backend.context_budget,
+    )
+    st.session_state["token_report"] = token_report
+    print(
+        f"Prompt tokens ~{token_report.total_tokens} (history {token_report.history_tokens}"
+        f" of {token_report.original_history_tokens}, dropped {token_report.dropped_messages})"
+    )
+    return messages
+
+
+def call_llm(
+    prompt: str,
+    system_prompt: str,
+    code_block: str,
+    artifact_type: str = "",
+    instructions: str = "",
+) -> Generator[str, None, None]:
+    backend = get_backend()
+    messages = prepare_messages(
+        prompt, system_prompt, code_block, backend, instructions
+    )
+    token_report = st.session_state["token_report"]
+    tags = {
+        "artifact_type": artifact_type,
+        "model": backend.model,
+        "session": get_session_id(),
+        "prompt_tokens": token_report.total_tokens,
+    }
+    response_cache = get_response_cache()
+    use_cache = st.session_state.get("use_cache", True)
+    cache_key = response_cache.key(
+        backend.model, system_prompt, messages[1:-1], messages[-1]["content"]
+    )
+    if use_cache and (cached := response_cache.get(cache_key)) is not None:
+        print("⚡ LLM response cache hit", cache_key[:12])
+        yield from telemetry.trace_stream(
+            response_cache.replay(cached), cache="hit", **tags
         )
-        model = "gemini-2.0-flash"
+        return
 
-    chat_history = st.session_state.get("messages", [])
-    messages = (
-        [{"role": "system", "content": system_prompt}]
-        + chat_history
-        + [{"role": "user", "content": prompt}]
+    content = stream_chat(backend.base_url, backend.model, messages)
+    if use_cache:
+        content = response_cache.record(cache_key, content)
+    yield from telemetry.trace_stream(content, cache="miss", **tags)
+    keep_warm(backend)
+
+
+def session_system_prompt(artifact_metadata: ArtifactMetadata) -> str:
+    # the edit instructions are part of the system prompt from the first turn on,
+    # switching them per turn would invalidate the cached prompt prefix
+    if st.session_state.get("patch_mode", True):
+        return artifact_metadata.prompt + patch_prompt
+    return artifact_metadata.prompt
+
+
+def race_llm(
+    prompt: str,
+    artifact_metadata: ArtifactMetadata,
+    count: int,
+    mix_backends: bool,
+    on_winner: Callable[[Candidate], None],
+) -> Candidate | None:
+    if mix_backends:
+        names = ("local", "remote")
+        backends = [llm_backends[names[index % 2]] for index in range(count)]
+    else:
+        backends = [get_backend()] * count
+
+    # history is compacted once, to fit the smallest context among the racers;
+    # candidates are validated as whole files, so they never answer with edits
+    system_prompt = session_system_prompt(artifact_metadata)
+    messages = prepare_messages(
+        prompt,
+        system_prompt,
+        artifact_metadata.code_block_type,
+        min(backends, key=lambda backend: backend.context_budget),
+        full_file_prompt if system_prompt != artifact_metadata.prompt else "",
     )
+    race = CandidateRace(
+        backends,
+        messages,
+        artifact_metadata.code_block_type,
+        validate=lambda code: validate_code(code, artifact_metadata.code_block_type),
+        on_winner=on_winner,
+        tags={"artifact_type": artifact_metadata.name, "session": get_session_id()},
+    )
+    winner = race.run(timeout=float(os.getenv("CANDIDATE_TIMEOUT", 180)))
+    for backend in {backend.name: backend for backend in backends}.values():
+        keep_warm(backend)
+    for candidate in race.candidates:
+        if candidate is not winner:
+            print(
+                f"Candidate {candidate.index} ({candidate.backend}):",
+                "cancelled" if candidate.cancelled else candidate.error,
+            )
+    return winner
+
+
+def check_code(code: str, artifact_metadata: ArtifactMetadata) -> str | None:
+    with telemetry.span(
+        "validation", artifact_type=artifact_metadata.name, session=get_session_id()
+    ) as span:
+        error = validate_code(code, artifact_metadata.code_block_type)
+        span.set(valid=error is None)
+    return error
+
+
+def current_artifact() -> str | None:
+    digest = st.session_state.get("artifact_digest")
+    return get_artifact_store().read(digest) if digest else None
 
-    response = client.chat.completions.create(
-        model=model, messages=messages, stream=True
+
+def apply_follow_up(
+    base_code: str, llm_response: str, artifact_metadata: ArtifactMetadata
+) -> str | None:
+    with telemetry.span(
+        "patch", artifact_type=artifact_metadata.name, session=get_session_id()
+    ) as span:
+        try:
+            code, edits = apply_response(
+                base_code, llm_response, artifact_metadata.code_block_type
+            )
+        except PatchError as e:
+            print("❌ Patch failed:", e)
+            span.set(applied=False)
+            return None
+        span.set(applied=True, edits=edits)
+    print(f"Applied {edits} edits" if edits else "Follow-up returned the full file")
+    return code
+
+
+def record_revision(artifact_metadata: ArtifactMetadata, prompt: str):
+    revisions: RevisionHistory = st.session_state.revisions
+    revisions.record(st.session_state["artifact_digest"], artifact_metadata, prompt)
+    # refresh the LRU clocks so the latest revisions restore without regenerating or rebuilding
+    builder = get_sandbox_pool().builder
+    for revision in revisions.warm():
+        get_artifact_store().get(revision.digest)
+        if builder and revision.artifact_metadata.render_mode == "build":
+            builder.bundles.get(revision.digest)
+
+
+def request_rollback(number: int):
+    revisions: RevisionHistory = st.session_state.revisions
+    revision = revisions.get(number)
+    code = get_artifact_store().read(revision.digest)
+    if code is None:
+        st.toast(f"Revision {number} is no longer stored", icon="❌")
+        return
+    # the restored code becomes the latest in the chat, so follow-ups edit this revision
+    code_block = revision.artifact_metadata.code_block_type
+    st.session_state.messages.append(
+        {"role": "user", "content": f"Roll back to revision {number}"}
+    )
+    st.session_state.messages.append(
+        {
+            "role": "assistant",
+            "content": f"Restored revision {number} ({revision.prompt})."
+            f"\n\n```{code_block}\n{code}\n```",
+        }
     )
-    for chunk in response:
-        if chunk.choices[0].delta.content:
-            yield chunk.choices[0].delta.content
+    st.session_state.rollback = (number, code)
+    revisions.current = number  # set before the sidebar renders on this rerun
+
+
+@st.cache_resource
+def preload_local_model():
+    # once per server process, so the first local prompt skips the model load
+    if os.getenv("LOCAL_LLM_PRELOAD", "1") == "1":
+        keep_warm(llm_backends["local"])
 
 
 # ------- UI ------- #
+def show_earlier_messages(page_size: int):
+    st.session_state.chat_visible = (
+        st.session_state.get("chat_visible", page_size) + page_size
+    )
+
+
+def render_chat(chat_log: ChatLog, page_size: int):
+    # only the latest page is rendered, older turns cost nothing on a rerun
+    visible = st.session_state.get("chat_visible", page_size)
+    start = max(len(chat_log) - visible, 0)
+    if start:
+        st.button(
+            f"Show {min(page_size, start)} earlier messages ({start} hidden)",
+            on_click=show_earlier_messages,
+            args=(page_size,),
+        )
+    for message in chat_log.messages[start:]:
+        with st.chat_message(message["role"]):
+            st.write(chat_log.expand(message))
+
+
+def wait_for_sandbox(url: str, artifact_metadata: ArtifactMetadata, sandbox: Sandbox):
+    try:
+        container = get_sandbox_pool().container(sandbox)
+        with telemetry.span(
+            "readiness",
+            artifact_type=artifact_metadata.name,
+            session=sandbox.session_id,
+        ):
+            waited = wait_until_ready(
+                url, timeout=artifact_metadata.ready_timeout, container=container
+            )
+        print(f"Sandbox ready after {waited:.2f}s", url)
+    except (ReadinessError, docker.errors.DockerException) as e:
+        st.toast(str(e).splitlines()[0], icon="❌")
+        print("❌ Error", str(e))
+        st.stop()
+
+
 def render_in_iframe(url: str):
-    time.sleep(3)  # to let the server run in Docker
     print("Rendering in iFrame....", url)
     with tab2:
         components.html(
@@ -140,29 +435,44 @@ def render_in_iframe(url: str):
     st.toast(f"Application running on: {url}", icon="🚀")
 
 
-def handle_renders(artifact_metadata: ArtifactMetadata):
+def render_inline(code: str):
+    print("Rendering inline in iFrame....")
+    with tab2:
+        components.html(
+            inline_iframe_html.format(srcdoc=html.escape(code, quote=True)),
+            height=800,
+            scrolling=True,
+        )
+
+
+def handle_renders(
+    artifact_metadata: ArtifactMetadata, code: str, deployment: Future | None = None
+):
+    if artifact_metadata.isolation == "inline":
+        stored = get_artifact_store().put(code, artifact_metadata.file_name)
+        st.session_state["artifact_digest"] = stored.digest
+        render_inline(code)
+        return
+
     web_address = None
-    match artifact_metadata.name:
-        case "static" | "svg" | "streamlit":
-            execute_docker(
-                host_path=os.path.dirname(artifact_metadata.file_path),
-                artifact_metadata=artifact_metadata,
-            )
-        case "vue":
-            execute_docker(
-                host_path=artifact_metadata.file_path,
-                artifact_metadata=artifact_metadata,
-                container_path="/home/runner/app/src/App.vue",
-            )
-    if artifact_metadata.host_port:
-        web_address = f"http://localhost:{artifact_metadata.host_port}"
+    sandbox = deploy_to_sandbox(artifact_metadata, code, deployment)
+    st.session_state["artifact_digest"] = sandbox.artifact_digest
+    if sandbox.host_port:
+        web_address = f"http://localhost:{sandbox.host_port}"
+        wait_for_sandbox(web_address, artifact_metadata, sandbox)
         render_in_iframe(web_address)
 
 
 # ------- MAIN APPLICATION BLOCK ------- #
 if __name__ == "__main__":
     st.set_page_config(page_title="LLM with Artifact Generation", layout="wide")
+    if telemetry.enabled:
+        telemetry.serve_metrics(int(os.getenv("TELEMETRY_METRICS_PORT", 9464)))
+    preload_local_model()
     init_session()
+    reap_ended_sessions()
+    session_id = get_session_id()
+    get_sandbox_pool().touch(session_id)  # keeps the idle reaper off this session
     col1, col2 = st.columns([3, 6])
     with col2:
         tab1, tab2 = st.tabs(["Code", "Preview"])
@@ -170,9 +480,7 @@ if __name__ == "__main__":
     with tab1:
         messages = st.container()
         with messages:
-            for message in st.session_state.messages:
-                with st.chat_message(message["role"]):
-                    st.write(message["content"])
+            render_chat(st.session_state.messages, int(os.getenv("CHAT_PAGE_SIZE", 10)))
 
     with col1:
         st.header("✨LLM Artifact Generation")
@@ -182,63 +490,292 @@ if __name__ == "__main__":
             index=0,
             disabled=st.session_state.get("selectbox_disabled", False),
         )
-        artifact_metadata = artifact_selector[artifact_type_selector]
+        # per-session copy, the selector entries are shared by every session in the process
+        artifact_metadata = artifact_selector[artifact_type_selector].model_copy()
+        if artifact_metadata.supports_inline:
+            artifact_metadata.isolation = st.radio(
+                "Isolation",
+                options=("inline", "docker"),
+                format_func={
+                    "inline": "Inline (no container)",
+                    "docker": "Docker sandbox",
+                }.get,
+                horizontal=True,
+            )
+        if artifact_metadata.supports_build:
+            artifact_metadata.render_mode = st.radio(
+                "Render mode",
+                options=("dev", "build"),
+                format_func={
+                    "dev": "Dev server",
+                    "build": "Production build",
+                }.get,
+                horizontal=True,
+                help="A production build is bundled once and served statically,"
+                " unchanged code is never rebuilt.",
+            )
+        sandbox_pool = get_sandbox_pool()
+        uses_sandbox = artifact_metadata.isolation == "docker"
+        if uses_sandbox:
+            # pre-start the sandbox while the user types
+            sandbox_pool.ensure_warm(session_id, artifact_metadata)
+            if artifact_metadata.render_mode == "build":
+                sandbox_pool.warm_builder()
         prompt = st.chat_input(
             placeholder="⌨️ Enter your prompt", on_submit=disable_selector
         )
         st.toggle("Use Local Models", value=False, key="local_mode")
+        st.toggle("Cache LLM Responses", value=True, key="use_cache")
+        candidate_count = st.number_input(
+            "Parallel candidates",
+            min_value=1,
+            max_value=4,
+            value=1,
+            help="Generate several responses at once and render the first valid one.",
+        )
+        st.toggle(
+            "Edit Follow-ups In Place",
+            value=True,
+            key="patch_mode",
+            help="Ask for search/replace edits to the current code instead of the whole file.",
+        )
+        st.toggle(
+            "Auto-repair Invalid Code",
+            value=True,
+            key="auto_repair",
+            help="Send validation errors back to the model for one more attempt.",
+        )
+        mix_backends = candidate_count > 1 and st.toggle(
+            "Race local and remote models", value=False
+        )
+        cache_stats = get_response_cache().stats()
+        st.caption(
+            f"Cache: {cache_stats.hits} hits / {cache_stats.misses} misses"
+            f" ({cache_stats.hit_rate:.0%}), {cache_stats.entries} entries"
+        )
+        occupancy = sandbox_pool.occupancy()
+        st.caption(
+            f"Sandboxes: {occupancy.live}/{occupancy.max_live or '∞'} live"
+            f", least recently used idle {occupancy.oldest_idle_s:.0f}s"
+        )
+        revisions: RevisionHistory = st.session_state.revisions
+        if len(revisions) > 1:
+            # labels must not change between reruns, or the picker resets to the latest
+            revision_number = st.selectbox(
+                "Revision",
+                options=[revision.number for revision in reversed(revisions.revisions)],
+                format_func=lambda number: f"#{number}"
+                f" · {revisions.get(number).prompt[:40]}",
+                key="revision_picker",
+            )
+            st.caption(f"Showing revision #{revisions.current} of {len(revisions)}")
+            st.button(
+                "⟲ Restore Revision",
+                on_click=request_rollback,
+                args=(revision_number,),
+                disabled=revision_number == revisions.current,
+                help="Render an earlier revision again without calling the model.",
+            )
         st.write("##")
         reset = st.button("↻ Reset Application")
+        export_format = st.selectbox("Archive format", options=list(export_formats))
+        include_dependencies = st.toggle(
+            "Include dependencies (node_modules)", value=False
+        )
         download_files = st.button(
             "⇊ Download Files",
         )
-        container_name = f"llm-artifact-{artifact_metadata.name}"
 
     if prompt:
         st.session_state.messages.append({"role": "user", "content": prompt})
 
-        response = call_llm(prompt=prompt, system_prompt=artifact_metadata.prompt)
+        deployments: list[Future] = []
+
+        def deploy_early(code: str):
+            if uses_sandbox:
+                deployments.append(
+                    sandbox_pool.deploy_async(session_id, artifact_metadata, code)
+                )
 
-        with col2:
-            messages.chat_message("user").write(prompt)
-            llm_response = messages.chat_message("ai").write_stream(response)
-            print("Raw LLM Response: ", llm_response)
-            generated_code = get_code_group(
-                llm_response=llm_response,
-                code_block=artifact_metadata.code_block_type,
+        if candidate_count > 1:
+            with col2:
+                messages.chat_message("user").write(prompt)
+                with messages.chat_message("ai"):
+                    with st.spinner(f"Racing {candidate_count} candidates..."):
+                        winner = race_llm(
+                            prompt,
+                            artifact_metadata,
+                            candidate_count,
+                            mix_backends,
+                            on_winner=lambda candidate: deploy_early(candidate.code),
+                        )
+                    if winner is None:
+                        msg = "No candidate produced valid code."
+                        print("❌", msg)
+                        st.toast(msg, icon="❌")
+                        st.stop()
+                    llm_response = winner.response
+                    generated_code = winner.code
+                    st.write(llm_response)
+                    st.caption(
+                        f"Candidate {winner.index + 1} ({winner.backend}) won"
+                        f" of {candidate_count}"
+                    )
+        else:
+            attempt_prompt = prompt
+            repairs_left = (
+                int(os.getenv("AUTO_REPAIR_ATTEMPTS", 1))
+                if st.session_state.get("auto_repair", True)
+                else 0
+            )
+            # follow-ups ask for edits against the current artifact instead of the whole file
+            patch_mode = st.session_state.get("patch_mode", True)
+            base_code = patch_mode and current_artifact()
+            system_prompt = session_system_prompt(artifact_metadata)
+            instructions = ""
+            show_prompt = True
+            while True:
+                # launch the sandbox as soon as a valid code fence closes, trailing prose streams meanwhile
+                fence_parser = FenceParser(
+                    artifact_metadata.code_block_type,
+                    on_open=lambda: uses_sandbox
+                    and not base_code
+                    and sandbox_pool.ensure_warm(session_id, artifact_metadata),
+                    on_block=lambda code: not base_code
+                    and check_code(code, artifact_metadata) is None
+                    and deploy_early(code),
+                )
+                response = fence_parser.wrap(
+                    call_llm(
+                        prompt=attempt_prompt,
+                        system_prompt=system_prompt,
+                        code_block=artifact_metadata.code_block_type,
+                        artifact_type=artifact_metadata.name,
+                        instructions=instructions,
+                    )
+                )
+
+                with col2:
+                    if show_prompt:
+                        messages.chat_message("user").write(attempt_prompt)
+                    llm_response = messages.chat_message("ai").write_stream(response)
+                    print("Raw LLM Response: ", llm_response)
+                    if base_code:
+                        generated_code = apply_follow_up(
+                            base_code, llm_response, artifact_metadata
+                        )
+                        if generated_code is None:
+                            st.toast("Edits did not apply, requesting the full file")
+                            base_code = None
+                            instructions = full_file_prompt
+                            show_prompt = False
+                            continue
+                        llm_response = with_full_code(
+                            llm_response,
+                            generated_code,
+                            artifact_metadata.code_block_type,
+                        )
+                    else:
+                        with telemetry.span(
+                            "extraction",
+                            artifact_type=artifact_metadata.name,
+                            session=session_id,
+                        ) as span:
+                            generated_code = fence_parser.code or get_code_group(
+                                llm_response=llm_response,
+                                code_block=artifact_metadata.code_block_type,
+                            )
+                            span.set(streamed=fence_parser.code is not None)
+                    print("streamed code group: ", generated_code)
+
+                # reject broken code before it costs a container launch
+                error = check_code(generated_code, artifact_metadata)
+                if not error:
+                    break
+                print("❌ Validation failed:", error)
+                st.toast(error, icon="❌")
+                if not repairs_left:
+                    st.stop()
+                repairs_left -= 1
+                base_code = None
+                instructions = ""
+                show_prompt = True
+                attempt_prompt = repair_prompt.format(error=error)
+                st.session_state.messages.append(
+                    {"role": "assistant", "content": llm_response}
+                )
+                st.session_state.messages.append(
+                    {"role": "user", "content": attempt_prompt}
+                )
+
+        if token_report := st.session_state.get("token_report"):
+            messages.caption(
+                f"~{token_report.total_tokens} prompt tokens"
+                f" (history {token_report.history_tokens}/{token_report.original_history_tokens})"
             )
-            print("regex got code group: ", generated_code)
 
         if generated_code and artifact_metadata.file_name:
             st.session_state.messages.append(
                 {"role": "assistant", "content": llm_response}
             )
-            temp_dir = tempfile.mkdtemp()
-            temp_dir_file_path = f"{temp_dir}/{artifact_metadata.file_name}"
-
-            with open(temp_dir_file_path, "w") as f:
-                f.write(generated_code)
-
-            artifact_metadata.file_path = temp_dir_file_path
 
             with col2:
-                stop_container(container_name)  # remove any existing containers
-                handle_renders(artifact_metadata)
+                handle_renders(
+                    artifact_metadata,
+                    generated_code,
+                    deployments[0] if deployments else None,
+                )
+            record_revision(artifact_metadata, prompt)
+
+    elif rollback := st.session_state.pop("rollback", None):
+        number, code = rollback
+        revision = st.session_state.revisions.get(number)
+        with telemetry.span(
+            "rollback",
+            artifact_type=revision.artifact_metadata.name,
+            session=session_id,
+        ):
+            with col2:
+                # an unchanged sandbox is reused as is, a build comes from the cache
+                handle_renders(revision.artifact_metadata.model_copy(), code)
 
     if reset:
-        stop_container(container_name)
+        sandbox_pool.release(session_id)
         st.session_state.clear()
-        file_path = artifact_metadata.file_path
-        if file_path and os.path.exists(file_path):
-            shutil.rmtree(os.path.dirname(file_path), ignore_errors=True)
         st.rerun()
 
     if download_files:
-        archive = download_project_archive()
-        st.download_button(
-            label="Download Project File",
-            data=archive,
-            file_name="project.tar",
-            mime="application/x-tar",
-            icon=":material/download:",
-        )
+        archive = None
+        if artifact_metadata.isolation == "docker":
+            archive = download_project_archive(
+                export_format, include_dependencies, artifact_metadata
+            )
+        digest = st.session_state.get("artifact_digest")
+        code = digest and get_artifact_store().read(digest)
+        if archive is not None:
+            st.download_button(
+                label="Download Project File",
+                data=archive,
+                file_name=f"project.{export_format}",
+                mime=export_formats[export_format],
+                icon=":material/download:",
+            )
+        elif code:
+            if artifact_metadata.isolation == "docker":
+                st.toast(
+                    "The sandbox is gone, downloading the generated file instead.",
+                    icon="⚠️",
+                )
+            st.download_button(
+                label="Download Project File",
+                data=code,
+                file_name=artifact_metadata.file_name,
+                mime=(
+                    "text/html"
+                    if artifact_metadata.file_name.endswith(".html")
+                    else "text/plain"
+                ),
+                icon=":material/download:",
+            )
+        else:
+            st.toast("Nothing to download yet, generate an artifact first.", icon="❌")
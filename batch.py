@@ -0,0 +1,270 @@
+"""
+Generate artifacts headlessly from a prompt file.
+
+Each line of the prompt file is either plain text (rendered as --type) or a JSON
+object with "prompt" and optionally "type" and "id". Extracted artifacts are
+written under the output directory next to a manifest.json.
+
+    python batch.py prompts.jsonl --out gallery --concurrency 8 --rate 2 --render
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+
+import openai
+from openai import AsyncOpenAI
+from pydantic import BaseModel, Field
+
+from history import build_messages
+from models import ArtifactMetadata, artifact_selector, llm_backends
+from readiness import wait_until_ready
+from sandbox import SandboxPool
+from store import ArtifactStore
+from streaming import extract_code_block
+from validation import validate_code
+
+
+class BatchItem(BaseModel):
+    id: str = Field(description="Stable identifier, used for the output directory.")
+    prompt: str = Field(description="The user prompt.")
+    type: str = Field(description="The artifact type, a key of artifact_selector.")
+
+
+class BatchResult(BaseModel):
+    id: str
+    prompt: str
+    type: str
+    status: str = Field(description="ok, no_code, invalid, render_failed or error.")
+    attempts: int = 0
+    duration_s: float = 0.0
+    path: str | None = None
+    digest: str | None = None
+    render_s: float | None = None
+    error: str | None = None
+
+
+class RateLimiter:
+    """Spaces request starts at least `1 / rate` seconds apart across all workers."""
+
+    def __init__(self, rate: float | None):
+        self.interval = 1 / rate if rate else 0.0
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def slugify(text: str, length: int = 40) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:length] or "artifact"
+
+
+def load_items(path: str, default_type: str) -> list[BatchItem]:
+    # checked up front, an unknown type would otherwise fail mid-batch
+    types = {name.lower(): name for name in artifact_selector}
+    items = []
+    with open(path) as f:
+        for index, line in enumerate(f):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            data = json.loads(line) if line.startswith("{") else {"prompt": line}
+            artifact_type = str(data.get("type", default_type))
+            if artifact_type.lower() not in types:
+                raise ValueError(
+                    f"{path}:{index + 1}: unknown type {artifact_type!r},"
+                    f" expected one of {', '.join(artifact_selector)}"
+                )
+            items.append(
+                BatchItem(
+                    id=str(data.get("id") or f"{index:04d}-{slugify(data['prompt'])}"),
+                    prompt=data["prompt"],
+                    type=types[artifact_type.lower()],
+                )
+            )
+    return items
+
+
+async def generate(
+    client: AsyncOpenAI,
+    model: str,
+    context_budget: int,
+    artifact_metadata: ArtifactMetadata,
+    prompt: str,
+) -> str:
+    messages, _ = build_messages(
+        system_prompt=artifact_metadata.prompt,
+        chat_history=[],
+        prompt=prompt,
+        code_block=artifact_metadata.code_block_type,
+        budget=context_budget,
+    )
+    response = await client.chat.completions.create(model=model, messages=messages)
+    return response.choices[0].message.content or ""
+
+
+def render(pool: SandboxPool, artifact_metadata: ArtifactMetadata, code: str) -> float:
+    session_id = f"batch-{uuid.uuid4().hex[:8]}"
+    started = time.monotonic()
+    try:
+        sandbox = pool.deploy(session_id, artifact_metadata, code)
+        wait_until_ready(
+            f"http://localhost:{sandbox.host_port}",
+            timeout=artifact_metadata.ready_timeout,
+            container=pool.container(sandbox),
+        )
+        return time.monotonic() - started
+    finally:
+        pool.release(session_id)
+
+
+async def run_item(
+    item: BatchItem,
+    client: AsyncOpenAI,
+    args: argparse.Namespace,
+    semaphore: asyncio.Semaphore,
+    render_semaphore: asyncio.Semaphore,
+    limiter: RateLimiter,
+    pool: SandboxPool | None,
+) -> BatchResult:
+    backend = llm_backends[args.backend]
+    artifact_metadata = artifact_selector[item.type].model_copy()
+    result = BatchResult(id=item.id, prompt=item.prompt, type=item.type, status="error")
+    started = time.monotonic()
+
+    async with semaphore:
+        for attempt in range(1, args.retries + 2):
+            result.attempts = attempt
+            await limiter.wait()
+            try:
+                response = await generate(
+                    client,
+                    args.model or backend.model,
+                    backend.context_budget,
+                    artifact_metadata,
+                    item.prompt,
+                )
+                break
+            except (
+                openai.APIConnectionError,
+                openai.RateLimitError,
+                openai.InternalServerError,
+            ) as e:
+                result.error = f"{type(e).__name__}: {e}"
+                if attempt > args.retries:
+                    result.duration_s = time.monotonic() - started
+                    return result
+                await asyncio.sleep(min(2 ** (attempt - 1), 30))
+            except openai.APIError as e:
+                result.error = f"{type(e).__name__}: {e}"
+                result.duration_s = time.monotonic() - started
+                return result
+
+    result.error = None
+    code = extract_code_block(response, artifact_metadata.code_block_type)
+    item_dir = os.path.join(args.out, item.id)
+    os.makedirs(item_dir, exist_ok=True)
+    with open(os.path.join(item_dir, "response.md"), "w") as f:
+        f.write(response)
+    if code is None:
+        result.status = "no_code"
+        result.duration_s = time.monotonic() - started
+        return result
+
+    result.path = os.path.join(item_dir, artifact_metadata.file_name)
+    with open(result.path, "w") as f:
+        f.write(code)
+    result.digest = ArtifactStore.digest(code, artifact_metadata.file_name)
+    result.error = validate_code(code, artifact_metadata.code_block_type)
+    result.status = "invalid" if result.error else "ok"
+
+    if pool and artifact_metadata.image_name and result.status == "ok":
+        artifact_metadata.isolation = "docker"
+        async with render_semaphore:
+            try:
+                result.render_s = await asyncio.to_thread(
+                    render, pool, artifact_metadata, code
+                )
+            except Exception as e:
+                result.status = "render_failed"
+                result.error = f"{type(e).__name__}: {e}".splitlines()[0]
+
+    result.duration_s = time.monotonic() - started
+    return result
+
+
+async def run_batch(
+    items: list[BatchItem], args: argparse.Namespace
+) -> list[BatchResult]:
+    backend = llm_backends[args.backend]
+    client = AsyncOpenAI(base_url=args.base_url or backend.base_url, max_retries=0)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    render_semaphore = asyncio.Semaphore(args.render_workers)
+    limiter = RateLimiter(args.rate)
+    pool = SandboxPool() if args.render else None
+    try:
+        tasks = [
+            run_item(item, client, args, semaphore, render_semaphore, limiter, pool)
+            for item in items
+        ]
+        results = []
+        for completed in asyncio.as_completed(tasks):
+            result = await completed
+            results.append(result)
+            print(f"[{len(results)}/{len(items)}] {result.status:<13} {result.id}")
+        return sorted(results, key=lambda r: r.id)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("prompts", help="prompt file, plain text or JSON lines")
+    parser.add_argument("--out", default="artifacts")
+    parser.add_argument("--type", default="Streamlit", choices=list(artifact_selector))
+    parser.add_argument("--backend", default="remote", choices=list(llm_backends))
+    parser.add_argument("--base-url", help="override the backend endpoint")
+    parser.add_argument("--model", help="override the backend model")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--rate", type=float, help="max requests started per second")
+    parser.add_argument(
+        "--render", action="store_true", help="boot each artifact in its sandbox"
+    )
+    parser.add_argument("--render-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    try:
+        items = load_items(args.prompts, args.type)
+    except ValueError as e:
+        parser.error(str(e))
+    os.makedirs(args.out, exist_ok=True)
+    started = time.monotonic()
+    results = asyncio.run(run_batch(items, args))
+    manifest = {
+        "created": time.time(),
+        "duration_s": round(time.monotonic() - started, 3),
+        "backend": args.backend,
+        "model": args.model or llm_backends[args.backend].model,
+        "artifacts": [result.model_dump() for result in results],
+    }
+    with open(os.path.join(args.out, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    ok = sum(result.status == "ok" for result in results)
+    print(f"✅ {ok}/{len(results)} artifacts written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
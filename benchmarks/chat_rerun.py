@@ -0,0 +1,88 @@
+"""
+Streamlit rerun time and session memory against chat length: every message
+re-rendered from a plain list (the old main block) against the paginated
+`render_chat` over a `ChatLog`.
+
+    python -m benchmarks.chat_rerun --turns 10 50 100 200 --code-lines 400
+"""
+
+import argparse
+import json
+import pickle
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from chat import ChatLog
+
+full_script = """
+import streamlit as st
+
+for message in st.session_state.messages:
+    with st.chat_message(message["role"]):
+        st.write(message["content"])
+"""
+
+paged_script = """
+import os
+import streamlit as st
+from app import render_chat
+
+render_chat(st.session_state.messages, int(os.getenv("CHAT_PAGE_SIZE", 10)))
+"""
+
+
+def conversation(turns: int, code_lines: int) -> list[dict]:
+    # every follow-up edits one line, as in an iterative session
+    lines = [f"    st.write('row {index}')" for index in range(code_lines)]
+    messages = []
+    for turn in range(turns):
+        lines[turn % code_lines] = f"    st.write('row {turn % code_lines} v{turn}')"
+        code = "import streamlit as st\n\nif True:\n" + "\n".join(lines)
+        messages.append({"role": "user", "content": f"Change row {turn}"})
+        messages.append(
+            {
+                "role": "assistant",
+                "content": f"Updated row {turn}.\n\n```python\n{code}\n```",
+            }
+        )
+    return messages
+
+
+def rerun_ms(script: str, state, runs: int) -> float:
+    app = AppTest.from_string(script, default_timeout=60)
+    app.session_state["messages"] = state
+    app.run()  # first run pays imports
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        app.run()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--code-lines", type=int, default=400)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for turns in args.turns:
+        messages = conversation(turns, args.code_lines)
+        chat_log = ChatLog()
+        for message in messages:
+            chat_log.append(message)
+        results[turns] = {
+            "full_rerun_ms": rerun_ms(full_script, messages, args.runs),
+            "paged_rerun_ms": rerun_ms(paged_script, chat_log, args.runs),
+            "full_session_bytes": len(pickle.dumps(messages)),
+            "paged_session_bytes": len(pickle.dumps(chat_log)),
+        }
+        print(f"{turns:>4} turns", json.dumps(results[turns]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-call client overhead: a fresh client per call (the old hot path) against the
+shared clients from `resources`.
+
+    python -m benchmarks.client_overhead --calls 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+import docker
+import docker.errors
+from openai import OpenAI
+
+import resources
+from benchmarks.stub_llm import StubLLMServer
+
+
+def _timed(fn, calls: int) -> dict:
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1] * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def _stream(client: OpenAI):
+    response = client.chat.completions.create(
+        model="stub", messages=[{"role": "user", "content": "hi"}], stream=True
+    )
+    for _ in response:
+        pass
+
+
+def bench_llm(calls: int) -> dict:
+    server = StubLLMServer(("127.0.0.1", 0), ttft=0, tokens_per_second=0, response="ok")
+    server.serve_in_background()
+    try:
+        fresh = _timed(lambda: _stream(OpenAI(base_url=server.base_url)), calls)
+        shared = _timed(
+            lambda: _stream(resources.get_llm_client(server.base_url)), calls
+        )
+    finally:
+        server.shutdown()
+    return {"fresh_client": fresh, "shared_client": shared}
+
+
+def bench_docker(calls: int) -> dict:
+    try:
+        docker.from_env().ping()
+    except docker.errors.DockerException as e:
+        return {"skipped": f"no Docker daemon reachable: {e}"}
+
+    def fresh():
+        client = docker.from_env()
+        client.containers.list()
+        client.close()
+
+    return {
+        "fresh_client": _timed(fresh, calls),
+        "shared_client": _timed(
+            lambda: resources.get_docker_client().containers.list(), calls
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    print(
+        json.dumps(
+            {"llm": bench_llm(args.calls), "docker": bench_docker(args.calls)}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
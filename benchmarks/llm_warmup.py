@@ -0,0 +1,121 @@
+"""
+Time to first token for the local backend: cold, after a preload, after idling
+past the server keep-alive with and without re-pinning, and per turn of a session
+whose system prompt is either stable or switched once edits are requested. Runs
+against the stub LLM server, which models Ollama's model load, keep-alive and
+KV cache prefix reuse.
+
+    python -m benchmarks.llm_warmup --cold-start 2 --server-keep-alive 1
+"""
+
+import argparse
+import json
+import os
+import time
+
+from benchmarks.stub_llm import StubLLMServer
+from history import build_messages
+from llm import preload_model, stream_chat
+from models import LLMBackend, artifact_selector
+from prompts import patch_prompt
+
+
+def ttft_ms(backend: LLMBackend, messages: list[dict]) -> float:
+    started = time.perf_counter()
+    stream = stream_chat(backend.base_url, backend.model, messages)
+    next(stream)
+    elapsed = time.perf_counter() - started
+    stream.close()
+    return round(elapsed * 1000, 1)
+
+
+def conversation(turns: int, stable_prefix: bool) -> list[list[dict]]:
+    """
+    Request messages for each turn of one session. With a stable prefix the edit
+    instructions are in the system prompt from the first turn, otherwise they are
+    only added once there is code to edit.
+    """
+    history, requests = [], []
+    for turn in range(turns):
+        prompt = f"Change the title to version {turn}"
+        system_prompt = artifact_selector["Streamlit"].prompt
+        if stable_prefix or turn:
+            system_prompt += patch_prompt
+        messages, _ = build_messages(
+            system_prompt, history, prompt, "python", budget=32768
+        )
+        requests.append(messages)
+        history += [
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": f"Done.\n\n```python\n# v{turn}\n```"},
+        ]
+    return requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cold-start", type=float, default=2.0)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=2000.0)
+    parser.add_argument(
+        "--server-keep-alive",
+        type=float,
+        default=1.0,
+        help="seconds the stub keeps a model after a chat request (Ollama default 5m)",
+    )
+    parser.add_argument("--turns", type=int, default=4)
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    def server() -> tuple[StubLLMServer, LLMBackend]:
+        stub = StubLLMServer(
+            ("127.0.0.1", 0),
+            ttft=args.ttft,
+            tokens_per_second=0,
+            cold_start=args.cold_start,
+            keep_alive=args.server_keep_alive,
+            prompt_tokens_per_second=args.prompt_tokens_per_second,
+        )
+        stub.serve_in_background()
+        backend = LLMBackend(
+            name="local",
+            base_url=stub.base_url,
+            model="stub",
+            context_budget=32768,
+            keep_alive="30m",
+        )
+        return stub, backend
+
+    first_prompt = conversation(1, False)[0]
+    results = {}
+
+    stub, backend = server()
+    results["cold_ttft_ms"] = ttft_ms(backend, first_prompt)
+    stub.shutdown()
+
+    stub, backend = server()
+    results["preload_ms"] = round(preload_model(backend) * 1000, 1)
+    results["preloaded_ttft_ms"] = ttft_ms(backend, first_prompt)
+    time.sleep(args.server_keep_alive * 1.5)
+    results["idle_unpinned_ttft_ms"] = ttft_ms(backend, first_prompt)
+    preload_model(backend)  # what keep_warm does after every request
+    time.sleep(args.server_keep_alive * 1.5)
+    results["idle_pinned_ttft_ms"] = ttft_ms(backend, first_prompt)
+    stub.shutdown()
+
+    for stable_prefix in (False, True):
+        stub, backend = server()
+        preload_model(backend)
+        samples = [
+            ttft_ms(backend, messages)
+            for messages in conversation(args.turns, stable_prefix)
+        ]
+        key = "stable" if stable_prefix else "switched"
+        results[f"session_ttft_ms_{key}_system_prompt"] = samples
+        stub.shutdown()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
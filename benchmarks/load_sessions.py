@@ -0,0 +1,92 @@
+"""
+Drive many simulated Streamlit sessions against a stub Docker API and check that
+sandboxes never collide on container names or host ports.
+
+    python -m benchmarks.load_sessions --sessions 50 --turns 5
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stubs import StubDockerClient
+from models import artifact_selector
+from ports import PortAllocator
+from sandbox import SandboxLimits, SandboxPool
+
+
+def run_session(
+    pool: SandboxPool, artifact_type: str, turns: int, seen: dict, lock: threading.Lock
+) -> list[float]:
+    session_id = uuid.uuid4().hex
+    artifact_metadata = artifact_selector[artifact_type].model_copy()
+    pool.warm(session_id, artifact_metadata).join()
+    latencies = []
+    for turn in range(turns):
+        started = time.perf_counter()
+        sandbox = pool.deploy(session_id, artifact_metadata, f"# turn {turn}\n")
+        latencies.append(time.perf_counter() - started)
+        with lock:
+            owner = seen.setdefault(("port", sandbox.host_port), session_id)
+            assert (
+                owner == session_id
+            ), f"port {sandbox.host_port} shared across sessions"
+    pool.release(session_id)
+    with lock:
+        for key in [k for k, v in seen.items() if v == session_id]:
+            del seen[key]
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--start-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    client = StubDockerClient(start_latency=args.start_latency)
+    ports = PortAllocator(30000, 30999)
+    pool = SandboxPool(
+        client_factory=lambda: client,
+        port_allocator=ports,
+        limits=SandboxLimits(max_live=None),  # every session keeps its sandbox
+    )
+    seen: dict = {}
+    lock = threading.Lock()
+    types = list(artifact_selector)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+        futures = [
+            executor.submit(
+                run_session, pool, types[i % len(types)], args.turns, seen, lock
+            )
+            for i in range(args.sessions)
+        ]
+        latencies = [latency for future in futures for latency in future.result()]
+    elapsed = time.perf_counter() - started
+
+    assert not client.containers.list(), "sandboxes leaked after release"
+    assert not ports.leases(), "port leases leaked after release"
+    print(
+        json.dumps(
+            {
+                "sessions": args.sessions,
+                "turns": args.turns,
+                "elapsed_s": round(elapsed, 3),
+                "peak_running": client.peak_running,
+                "deploy_p50_ms": round(statistics.median(latencies) * 1000, 3),
+                "deploy_max_ms": round(max(latencies) * 1000, 3),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+End-to-end latency of the generation pipeline, from prompt to ready preview,
+driven headlessly against the stub LLM server and a stub (or real) Docker daemon.
+
+    python -m benchmarks.pipeline --concurrency 1 4 16 --runs 10 --output pipeline.json
+    python -m benchmarks.pipeline --baseline pipeline.json  # compare against a previous run
+"""
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.stubs import StubDockerClient
+from history import build_messages
+from llm import stream_chat
+from models import ArtifactMetadata, artifact_selector
+from ports import PortAllocator
+from readiness import wait_until_ready
+from resources import get_docker_client
+from sandbox import SandboxPool
+from store import ArtifactStore
+from streaming import FenceParser
+
+STAGES = ("ttft", "stream", "extraction", "file_write", "container_start", "readiness")
+METRICS = STAGES + ("total",)
+
+canned_code = {
+    "python": 'import streamlit as st\n\nst.title("Benchmark")\nst.write("ok")',
+    "html": "<!DOCTYPE html>\n<html>\n<body>\n<h1>Benchmark</h1>\n</body>\n</html>",
+    "vue": "<template>\n  <h1>Benchmark</h1>\n</template>\n\n<script setup>\n</script>",
+}
+
+
+def canned_response(request: dict) -> str:
+    system_prompt = request["messages"][0]["content"]
+    code_block = next(
+        (
+            m.code_block_type
+            for m in artifact_selector.values()
+            if m.prompt == system_prompt
+        ),
+        "python",
+    )
+    code = canned_code[code_block]
+    return f"Here you go.\n\n```{code_block}\n{code}\n```\n\nThis renders a heading."
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 3)
+
+    return {"p50_ms": at(0.5), "p90_ms": at(0.9), "p99_ms": at(0.99), "n": len(ordered)}
+
+
+def run_once(
+    pool: SandboxPool,
+    store: ArtifactStore,
+    base_url: str,
+    artifact_metadata: ArtifactMetadata,
+    prewarm: bool,
+) -> dict:
+    session_id = uuid.uuid4().hex
+    uses_sandbox = artifact_metadata.isolation == "docker"
+    timings = dict.fromkeys(STAGES, 0.0)
+    if uses_sandbox and prewarm:
+        pool.warm(session_id, artifact_metadata).join()  # page load, before the prompt
+
+    deployments: list[Future] = []
+
+    def deploy(code: str):
+        submitted = time.perf_counter()
+        deployment = pool.deploy_async(session_id, artifact_metadata, code)
+        deployment.add_done_callback(
+            lambda _: timings.update(container_start=time.perf_counter() - submitted)
+        )
+        deployments.append(deployment)
+
+    parser = FenceParser(
+        artifact_metadata.code_block_type,
+        on_block=deploy if uses_sandbox else None,
+    )
+    messages, _ = build_messages(
+        artifact_metadata.prompt,
+        [],
+        "Build a page with a heading",
+        artifact_metadata.code_block_type,
+        budget=32768,
+    )
+
+    started = time.perf_counter()
+    first_token = None
+    for token in stream_chat(base_url, "stub", messages):
+        if first_token is None:
+            first_token = time.perf_counter()
+            timings["ttft"] = first_token - started
+        feed_started = time.perf_counter()
+        parser.feed(token)
+        timings["extraction"] += time.perf_counter() - feed_started
+    feed_started = time.perf_counter()
+    parser.close()
+    timings["extraction"] += time.perf_counter() - feed_started
+    timings["stream"] = time.perf_counter() - (first_token or started)
+
+    write_started = time.perf_counter()
+    store.put(parser.code, artifact_metadata.file_name)
+    timings["file_write"] = time.perf_counter() - write_started
+
+    if uses_sandbox:
+        sandbox = deployments[0].result()
+        ready_started = time.perf_counter()
+        wait_until_ready(
+            f"http://127.0.0.1:{sandbox.host_port}",
+            timeout=artifact_metadata.ready_timeout,
+            container=pool.container(sandbox),
+        )
+        timings["readiness"] = time.perf_counter() - ready_started
+    timings["total"] = time.perf_counter() - started
+    pool.release(session_id)
+    return timings
+
+
+def run_level(
+    pool: SandboxPool,
+    store: ArtifactStore,
+    base_url: str,
+    artifact_metadata: ArtifactMetadata,
+    concurrency: int,
+    runs: int,
+    prewarm: bool,
+) -> dict:
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(
+                lambda _: run_once(pool, store, base_url, artifact_metadata, prewarm),
+                range(runs * concurrency),
+            )
+        )
+    return {metric: percentiles([r[metric] for r in results]) for metric in METRICS}
+
+
+def compare(results: dict, baseline: dict):
+    for key, metrics in results["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if not previous:
+            continue
+        before = previous["total"].get("p50_ms")
+        after = metrics["total"].get("p50_ms")
+        if before and after:
+            print(
+                f"{key:<28} total p50 {before:>9.1f}ms -> {after:>9.1f}ms ({after / before:.2f}x)"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--runs", type=int, default=5, help="runs per session slot")
+    parser.add_argument("--types", nargs="+", default=list(artifact_selector))
+    parser.add_argument("--isolation", choices=("default", "docker"), default="default")
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--docker", choices=("stub", "real"), default="stub")
+    parser.add_argument("--start-latency", type=float, default=0.3)
+    parser.add_argument("--ready-latency", type=float, default=0.5)
+    parser.add_argument(
+        "--cold", action="store_true", help="skip the page-load pre-warm"
+    )
+    parser.add_argument("--output", default="pipeline_bench.json")
+    parser.add_argument("--baseline", help="previous output to compare against")
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    llm_server = StubLLMServer(
+        ("127.0.0.1", 0),
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        respond=canned_response,
+    )
+    llm_server.serve_in_background()
+
+    if args.docker == "stub":
+        client = StubDockerClient(
+            start_latency=args.start_latency,
+            ready_latency=args.ready_latency,
+            serve_http=True,
+        )
+        client_factory = lambda: client  # noqa: E731
+    else:
+        client_factory = get_docker_client
+
+    store = ArtifactStore(tempfile.mkdtemp(prefix="bench-artifacts-"))
+    pool = SandboxPool(
+        client_factory=client_factory,
+        port_allocator=PortAllocator(31000, 31999),
+        artifact_store=store,
+    )
+
+    results = {}
+    try:
+        for artifact_type in args.types:
+            artifact_metadata = artifact_selector[artifact_type].model_copy()
+            if args.isolation == "docker":
+                artifact_metadata.isolation = "docker"
+            for concurrency in args.concurrency:
+                key = f"{artifact_type}@{concurrency}"
+                results[key] = run_level(
+                    pool,
+                    store,
+                    llm_server.base_url,
+                    artifact_metadata,
+                    concurrency,
+                    args.runs,
+                    prewarm=not args.cold,
+                )
+                total = results[key]["total"]
+                print(
+                    f"{key:<28} total p50 {total['p50_ms']:>9.1f}ms p99 {total['p99_ms']:>9.1f}ms"
+                )
+    finally:
+        llm_server.shutdown()
+
+    output = {
+        "created": time.time(),
+        "host": platform.node(),
+        "config": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(output, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
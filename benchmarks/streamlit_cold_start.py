@@ -0,0 +1,131 @@
+"""
+Streamlit sandbox start-up: `streamlit run` (the old entrypoint) against the
+preloading runner in sandbox/streamlit/runner.py. Both run as local processes
+with this interpreter and whichever allowed libraries are installed.
+
+Reports the time until the server answers its health check, and the first
+render of an artifact importing the allowed libraries once the server is up,
+which is what a user waits for when the sandbox was pre-warmed.
+
+    python -m benchmarks.streamlit_cold_start --runs 5
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from tornado.websocket import websocket_connect
+
+RUNNER = os.path.join(
+    os.path.dirname(__file__), "..", "sandbox", "streamlit", "runner.py"
+)
+ALLOWED = (
+    "numpy",
+    "pandas",
+    "matplotlib",
+    "seaborn",
+    "plotly",
+    "PIL",
+    "requests",
+    "bs4",
+)
+
+
+def artifact(marker: str) -> str:
+    modules = [m for m in ALLOWED if importlib.util.find_spec(m)]
+    imports = "\n".join(f"import {module}" for module in modules)
+    return (
+        f"import time\nimport streamlit as st\n{imports}\n\n"
+        f"open({marker!r}, 'w').write(str(time.time()))\nst.write('ok')\n"
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_healthy(port: int, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(
+                f"http://127.0.0.1:{port}/_stcore/health", timeout=1
+            ):
+                return
+        except OSError:
+            time.sleep(0.02)
+    raise TimeoutError(f"streamlit on port {port} never became healthy")
+
+
+async def first_render(port: int, marker: str, timeout: float = 60) -> float:
+    # what the browser does on page load: open the stream and ask for a script run
+    ws = await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream")
+    started = time.monotonic()
+    message = BackMsg()
+    message.rerun_script.query_string = ""
+    await ws.write_message(message.SerializeToString(), binary=True)
+    while not os.path.exists(marker):
+        if time.monotonic() - started > timeout:
+            raise TimeoutError("the artifact never ran")
+        await asyncio.sleep(0.005)
+    elapsed = time.monotonic() - started
+    ws.close()
+    return elapsed
+
+
+def run_once(mode: str) -> dict:
+    workdir = tempfile.mkdtemp(prefix="st-bench-")
+    marker = os.path.join(workdir, "rendered")
+    script = os.path.join(workdir, "run.py")
+    with open(script, "w") as f:
+        f.write(artifact(marker))
+    port = free_port()
+    args = [script, f"--server.port={port}", "--server.headless=true"]
+    command = (
+        [sys.executable, "-m", "streamlit", "run", *args]
+        if mode == "cold"
+        else [sys.executable, RUNNER, *args]
+    )
+    started = time.monotonic()
+    process = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_healthy(port)
+        healthy = time.monotonic() - started
+        render = asyncio.run(first_render(port, marker))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {"healthy_ms": healthy * 1000, "first_render_ms": render * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("cold", "runner"):
+        samples = [run_once(mode) for _ in range(args.runs)]
+        results[mode] = {
+            metric: round(statistics.median(s[metric] for s in samples), 1)
+            for metric in ("healthy_ms", "first_render_ms")
+        }
+    print(json.dumps({"p50": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
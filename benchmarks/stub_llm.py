@@ -0,0 +1,218 @@
+"""
+Local OpenAI-compatible chat completions server that streams a canned response
+with a configurable time to first token and token rate.
+
+    python -m benchmarks.stub_llm --port 8765 --ttft 0.2 --tokens-per-second 80
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+default_response = """Here is the app.
+
+```python
+import streamlit as st
+
+st.title("Hello from the stub LLM")
+st.write("This response was streamed by benchmarks.stub_llm")
+```
+
+It shows a title and a line of text."""
+
+
+def parse_keep_alive(value) -> float:
+    """Seconds for an Ollama keep_alive value ("30m", "1h", 300, -1 for forever)."""
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = re.fullmatch(r"(-?[\d.]+)(ms|s|m|h)?", str(value).strip())
+        if not match:
+            raise ValueError(f"invalid keep_alive {value!r}")
+        unit = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[match.group(2) or "s"]
+        seconds = float(match.group(1)) * unit
+    return float("inf") if seconds < 0 else seconds
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        ttft: float = 0.1,
+        tokens_per_second: float = 100.0,
+        response: str = default_response,
+        cold_start: float = 0.0,
+        respond: Callable[[dict], str] | None = None,
+        keep_alive: float = float("inf"),
+        prompt_tokens_per_second: float = 0.0,
+    ):
+        super().__init__(address, StubLLMHandler)
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.response = response
+        # picks the canned response per request, e.g. by system prompt
+        self.respond = respond or (lambda request: self.response)
+        # extra latency paid once per model until it is loaded, like Ollama after idle
+        self.cold_start = cold_start
+        # seconds a model stays loaded after a chat request, Ollama's OLLAMA_KEEP_ALIVE
+        self.keep_alive = keep_alive
+        # prompt processing rate for tokens past the prefix shared with the previous
+        # request, like a reused KV cache; 0 makes prompts free
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.loaded_models: dict[str, float] = {}  # model -> unload time
+        self.last_prompts: dict[str, str] = {}
+        self.requests: list[dict] = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/v1"
+
+    def tokens(self, text: str) -> list[str]:
+        # split on spaces but keep them, roughly matching BPE chunk sizes
+        return [word + " " for word in text.split(" ")][:-1] + [text.split(" ")[-1]]
+
+    def serve_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = (
+        "HTTP/1.1"  # keep-alive, so client connection reuse is measurable
+    )
+    disable_nagle_algorithm = True
+    server: StubLLMServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: str):
+        encoded = data.encode()
+        self.wfile.write(f"{len(encoded):x}\r\n".encode() + encoded + b"\r\n")
+        self.wfile.flush()
+
+    def _load_model(self, model: str, keep_alive: float):
+        if self.server.loaded_models.get(model, 0) < time.monotonic():
+            time.sleep(self.server.cold_start)
+            self.server.last_prompts.pop(model, None)  # unloading drops the KV cache
+        self.server.loaded_models[model] = time.monotonic() + keep_alive
+
+    def _process_prompt(self, model: str, messages: list[dict]):
+        prompt = "".join(f"{m['role']}:{m['content']}\n" for m in messages)
+        previous = self.server.last_prompts.get(model, "")
+        shared = 0
+        for shared, (a, b) in enumerate(zip(prompt, previous)):
+            if a != b:
+                break
+        else:
+            shared = min(len(prompt), len(previous))
+        self.server.last_prompts[model] = prompt
+        if self.server.prompt_tokens_per_second:
+            uncached_tokens = (len(prompt) - shared) / 4
+            time.sleep(uncached_tokens / self.server.prompt_tokens_per_second)
+
+    def do_GET(self):
+        self._send_json({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+
+    def do_POST(self):
+        try:
+            self._handle_post()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away mid-stream, e.g. a cancelled candidate
+
+    def _handle_post(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append(request)
+        model = request.get("model", "stub")
+
+        if self.path.startswith("/api/"):  # Ollama native preload / keep-alive calls
+            keep_alive = request.get("keep_alive", self.server.keep_alive)
+            self._load_model(model, parse_keep_alive(keep_alive))
+            self._send_json({"model": model, "done": True})
+            return
+
+        self._load_model(model, self.server.keep_alive)
+        self._process_prompt(model, request.get("messages", []))
+        content = self.server.respond(request)
+        if not request.get("stream"):
+            time.sleep(self.server.ttft)
+            self._send_json(
+                {
+                    "id": "stub",
+                    "object": "chat.completion",
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": content,
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            )
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(self.server.ttft)
+        delay = (
+            1 / self.server.tokens_per_second if self.server.tokens_per_second else 0
+        )
+        for index, token in enumerate(self.server.tokens(content)):
+            if index:
+                time.sleep(delay)
+            chunk = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": {"content": token}, "finish_reason": None}
+                ],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.1)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--cold-start", type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubLLMServer(
+        (args.host, args.port),
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        cold_start=args.cold_start,
+    )
+    print(f"Stub LLM serving on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
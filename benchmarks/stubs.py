@@ -0,0 +1,172 @@
+import io
+import tarfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import docker.errors
+
+
+class StubContainer:
+    def __init__(self, client: "StubDockerClient", name: str, image: str, ports: dict):
+        self.client = client
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.image = image
+        self.ports = ports
+        self.status = "running"
+        self.files: dict[str, bytes] = {}
+        self._server: ThreadingHTTPServer | None = None
+        if client.serve_http:
+            # answer HTTP on the published port once the "server inside" has booted
+            timer = threading.Timer(client.ready_latency, self._serve)
+            timer.daemon = True
+            timer.start()
+
+    def _serve(self):
+        if self.status != "running":
+            return
+        host_port = next((int(p) for p in self.ports.values() if p), None)
+        if host_port is None:
+            return
+        self._server = ThreadingHTTPServer(("127.0.0.1", host_port), _OkHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def _shutdown(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def attrs(self) -> dict:
+        return {"Id": self.id, "Name": self.name, "State": {"Status": self.status}}
+
+    def reload(self):
+        if self.id not in self.client.containers._by_id:
+            raise docker.errors.NotFound(f"No such container: {self.id}")
+
+    def put_archive(self, path: str, data: bytes) -> bool:
+        if self.status != "running":
+            raise docker.errors.APIError(f"container {self.name} is not running")
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            for member in tar.getmembers():
+                self.files[f"{path}/{member.name}"] = tar.extractfile(member).read()
+        return True
+
+    def exec_run(self, cmd: list[str], workdir: str | None = None, **kwargs):
+        if "build" in cmd and "--outDir" in cmd:  # stands in for `vite build`
+            time.sleep(self.client.build_latency)
+            out_dir = cmd[cmd.index("--outDir") + 1]
+            self.files[f"{out_dir}/index.html"] = b"<html><body>built</body></html>"
+            self.files[f"{out_dir}/assets/index.js"] = b"console.log('built')"
+        elif cmd[:2] == ["rm", "-rf"]:
+            for path in [p for p in self.files if p.startswith(cmd[2] + "/")]:
+                del self.files[path]
+        return 0, b""
+
+    def get_archive(self, path: str):
+        root = path.removesuffix("/.")
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for name, data in self.files.items():
+                if name.startswith(root + "/"):
+                    info = tarfile.TarInfo("./" + name[len(root) + 1 :])
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+        return iter([buffer.getvalue()]), {"name": root}
+
+    def logs(self, tail: int | str = "all", **kwargs) -> bytes:
+        return b""
+
+    def stop(self, **kwargs):
+        self.status = "exited"
+        self._shutdown()
+
+    def remove(self, force: bool = False, **kwargs):
+        if self.status == "running" and not force:
+            raise docker.errors.APIError("container is running, stop it or use force")
+        self.status = "removed"
+        self._shutdown()
+        self.client.containers._remove(self)
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = b"<html><body>stub sandbox</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubContainers:
+    def __init__(self, client: "StubDockerClient"):
+        self.client = client
+        self._lock = threading.Lock()
+        self._by_id: dict[str, StubContainer] = {}
+        self._by_name: dict[str, StubContainer] = {}
+        self._bound_ports: set[int] = set()
+
+    def run(self, image: str, name: str, ports: dict | None = None, **kwargs):
+        time.sleep(self.client.start_latency)
+        host_ports = {int(p) for p in (ports or {}).values() if p}
+        with self._lock:
+            if name in self._by_name:
+                raise docker.errors.APIError(
+                    f"Conflict. The container name {name} is already in use"
+                )
+            if host_ports & self._bound_ports:
+                raise docker.errors.APIError(
+                    f"Bind for ports {host_ports} failed: port is already allocated"
+                )
+            container = StubContainer(self.client, name, image, ports or {})
+            self._by_id[container.id] = container
+            self._by_name[name] = container
+            self._bound_ports |= host_ports
+            self.client.peak_running = max(self.client.peak_running, len(self._by_id))
+            return container
+
+    def get(self, container_id: str) -> StubContainer:
+        with self._lock:
+            container = self._by_id.get(container_id) or self._by_name.get(container_id)
+        if not container:
+            raise docker.errors.NotFound(f"No such container: {container_id}")
+        return container
+
+    def list(self, all: bool = False, **kwargs) -> list[StubContainer]:
+        with self._lock:
+            return list(self._by_id.values())
+
+    def _remove(self, container: StubContainer):
+        with self._lock:
+            self._by_id.pop(container.id, None)
+            self._by_name.pop(container.name, None)
+            self._bound_ports -= {int(p) for p in container.ports.values() if p}
+
+
+class StubDockerClient:
+    """In-process stand-in for `docker.DockerClient` enforcing name and port conflicts."""
+
+    def __init__(
+        self,
+        start_latency: float = 0.0,
+        ready_latency: float = 0.0,
+        serve_http: bool = False,
+        build_latency: float = 0.0,
+    ):
+        self.start_latency = start_latency
+        self.ready_latency = ready_latency
+        self.serve_http = serve_http
+        self.build_latency = build_latency
+        self.peak_running = 0
+        self.containers = StubContainers(self)
+
+    def ping(self) -> bool:
+        return True
@@ -0,0 +1,77 @@
+import io
+import tarfile
+import threading
+from typing import Callable
+
+from docker.models.containers import Container
+
+from sandbox import CONTAINER_APP_PATH, pack_files
+from store import ArtifactStore
+
+
+class BuildError(Exception):
+    pass
+
+
+def _reroot(archive: bytes) -> bytes:
+    # get_archive of `dir/.` names entries `./...`; strip it so they extract in place
+    source = tarfile.open(fileobj=io.BytesIO(archive))
+    buffer = io.BytesIO()
+    with source, tarfile.open(fileobj=buffer, mode="w") as target:
+        for member in source.getmembers():
+            name = member.name.removeprefix("./").lstrip("/")
+            if not name or name == ".":
+                continue
+            member.name = name
+            target.addfile(
+                member, source.extractfile(member) if member.isfile() else None
+            )
+    return buffer.getvalue()
+
+
+class VueBuilder:
+    """
+    Runs production `vite build`s of generated App.vue files inside one
+    long-lived Vue sandbox, so node_modules, Vite's cache and the OS file cache
+    stay warm between builds. Bundles are kept in an ArtifactStore under the
+    App.vue digest and an unchanged file is never rebuilt.
+    """
+
+    def __init__(self, bundles: ArtifactStore):
+        self.bundles = bundles
+        self._lock = threading.Lock()  # one build at a time, they share the project dir
+
+    def build(
+        self, code: str, digest: str, container: Callable[[], Container]
+    ) -> tuple[bytes, bool]:
+        """
+        Return the built bundle as a tar archive and whether it came from the cache.
+        `container` is only called on a cache miss, to get the running builder.
+        """
+        if (bundle := self.bundles.read_bytes(digest)) is not None:
+            return bundle, True
+
+        with self._lock:
+            if (bundle := self.bundles.read_bytes(digest)) is not None:
+                return bundle, True  # built by a concurrent request for the same code
+
+            builder = container()
+            builder.put_archive(
+                f"{CONTAINER_APP_PATH}/src", pack_files({"App.vue": code})
+            )
+            out_dir = f"/tmp/build-{digest[:12]}"
+            exit_code, output = builder.exec_run(
+                ["npx", "vite", "build", "--outDir", out_dir, "--emptyOutDir"],
+                workdir=CONTAINER_APP_PATH,
+            )
+            if exit_code:
+                tail = output.decode(errors="replace").strip().splitlines()[-20:]
+                raise BuildError("vite build failed:\n" + "\n".join(tail))
+            try:
+                stream, _ = builder.get_archive(f"{out_dir}/.")
+                bundle = _reroot(b"".join(stream))
+            finally:
+                builder.exec_run(["rm", "-rf", out_dir])
+
+        self.bundles.put_bytes(digest, bundle, "bundle.tar")
+        return bundle, False
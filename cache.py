@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Generator, Iterable
+
+from pydantic import BaseModel, Field
+
+
+class CacheStats(BaseModel):
+    hits: int = Field(default=0, description="Lookups served from the cache.")
+    misses: int = Field(default=0, description="Lookups that went to the LLM.")
+    evictions: int = Field(default=0, description="Entries removed by size or TTL.")
+    entries: int = Field(default=0, description="Entries currently on disk.")
+    size_bytes: int = Field(default=0, description="Bytes currently on disk.")
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class ResponseCache:
+    """On-disk LLM response cache with TTL and least-recently-used size eviction."""
+
+    def __init__(
+        self, root: str, max_bytes: int = 256 * 1024 * 1024, ttl: float = 7 * 86400
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        os.makedirs(root, exist_ok=True)
+
+    def key(
+        self, model: str, system_prompt: str, messages: list[dict], prompt: str
+    ) -> str:
+        payload = {
+            "model": model,
+            "system": _normalize(system_prompt),
+            "history": [(m["role"], _normalize(m["content"])) for m in messages],
+            "prompt": _normalize(prompt),
+        }
+        return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str) -> list[str] | None:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self._stats.misses += 1
+            return None
+
+        if time.time() - entry["created"] > self.ttl:
+            self._remove(path)
+            with self._lock:
+                self._stats.misses += 1
+                self._stats.evictions += 1
+            return None
+
+        os.utime(path)  # mtime doubles as the LRU clock
+        with self._lock:
+            self._stats.hits += 1
+        return entry["chunks"]
+
+    def put(self, key: str, chunks: list[str]):
+        entry = {"created": time.time(), "chunks": chunks}
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def replay(self, chunks: list[str]) -> Generator[str, None, None]:
+        yield from chunks
+
+    def record(self, key: str, stream: Iterable[str]) -> Generator[str, None, None]:
+        """Pass the live stream through and store it only once it completed."""
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            self.put(key, chunks)
+
+    def _entries(self) -> list[os.DirEntry]:
+        return [e for e in os.scandir(self.root) if e.name.endswith(".json")]
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entries)
+        now = time.time()
+        evicted = 0
+        for entry in entries:
+            expired = now - entry.stat().st_mtime > self.ttl
+            if not expired and total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            self._remove(entry.path)
+            evicted += 1
+        with self._lock:
+            self._stats.evictions += evicted
+
+    def stats(self) -> CacheStats:
+        entries = self._entries()
+        with self._lock:
+            return self._stats.model_copy(
+                update={
+                    "entries": len(entries),
+                    "size_bytes": sum(e.stat().st_size for e in entries),
+                }
+            )
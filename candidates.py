@@ -0,0 +1,148 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+from pydantic import BaseModel, Field
+
+from llm import stream_chat
+from models import LLMBackend
+from streaming import FenceParser
+from telemetry import telemetry
+
+
+class Candidate(BaseModel):
+    index: int = Field(description="Position of the candidate in the race.")
+    backend: str = Field(description="Name of the backend that produced it.")
+    response: str = Field(default="", description="The response text received.")
+    code: str | None = Field(default=None, description="The extracted code block.")
+    error: str | None = Field(default=None, description="Why the candidate lost.")
+    cancelled: bool = Field(default=False, description="Stopped after another won.")
+
+
+class CandidateRace:
+    """
+    Streams the same request from several backends at once. The first candidate
+    whose code block closes and passes `validate` wins; `on_winner` fires right
+    away so the sandbox can start while the winner finishes streaming, and every
+    other stream is closed.
+    """
+
+    def __init__(
+        self,
+        backends: list[LLMBackend],
+        messages: list[dict],
+        code_block: str,
+        validate: Callable[[str], str | None] | None = None,
+        on_winner: Callable[[Candidate], None] | None = None,
+        tags: dict | None = None,
+    ):
+        self.backends = backends
+        self.messages = messages
+        self.code_block = code_block
+        self.validate = validate or (lambda code: None)
+        self.on_winner = on_winner
+        self.tags = tags or {}
+        self.candidates = [
+            Candidate(index=index, backend=backend.name)
+            for index, backend in enumerate(backends)
+        ]
+        self.winner: Candidate | None = None
+        self._lock = threading.Lock()
+        self._decided = threading.Event()
+        self._stopped = threading.Event()  # the race timed out, the winner stops too
+        self._chunks: list[list[str]] = [[] for _ in backends]
+
+    def _claim(self, candidate: Candidate) -> bool:
+        with self._lock:
+            if self._decided.is_set():
+                return False  # someone already won, or the race timed out
+            self.winner = candidate
+            self._decided.set()
+        if self.on_winner:
+            self.on_winner(candidate)
+        return True
+
+    def _check(self, candidate: Candidate, code: str) -> bool:
+        error = self.validate(code)
+        if error:
+            candidate.error = f"validation: {error}"
+            return False
+        candidate.code = code
+        return self._claim(candidate)
+
+    def _run(self, candidate: Candidate, backend: LLMBackend):
+        parser = FenceParser(self.code_block)
+        chunks = self._chunks[candidate.index]
+        checked = False
+        stream = telemetry.trace_stream(
+            stream_chat(backend.base_url, backend.model, self.messages),
+            model=backend.model,
+            candidate=candidate.index,
+            **self.tags,
+        )
+        try:
+            for chunk in stream:
+                if self._stopped.is_set() or (
+                    self._decided.is_set() and self.winner is not candidate
+                ):
+                    candidate.cancelled = True
+                    return
+                chunks.append(chunk)
+                parser.feed(chunk)
+                if parser.code and not checked:
+                    checked = True
+                    if not self._check(candidate, parser.code):
+                        return  # invalid code, no point streaming the rest
+            parser.close()
+            if not checked:
+                if parser.code:
+                    self._check(candidate, parser.code)
+                else:
+                    candidate.error = "no code block in response"
+        except Exception as e:
+            candidate.error = f"{type(e).__name__}: {e}"
+        finally:
+            stream.close()
+            candidate.response = "".join(chunks)
+
+    def run(self, timeout: float | None = None) -> Candidate | None:
+        """
+        Block until the winner finished streaming, every candidate failed, or
+        `timeout` seconds passed for the whole race. A winner cut off by the timeout
+        keeps the response streamed so far, its code block is already complete.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        executor = ThreadPoolExecutor(
+            max_workers=len(self.backends), thread_name_prefix="candidate"
+        )
+        futures = {
+            executor.submit(self._run, candidate, backend): candidate
+            for candidate, backend in zip(self.candidates, self.backends)
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                remaining = (
+                    max(deadline - time.monotonic(), 0)
+                    if deadline is not None
+                    else None
+                )
+                done, pending = wait(
+                    pending, timeout=remaining, return_when=FIRST_COMPLETED
+                )
+                if not done:
+                    with self._lock:
+                        self._decided.set()  # timed out, stop everyone
+                        self._stopped.set()
+                    if self.winner:
+                        self.winner.response = "".join(
+                            list(self._chunks[self.winner.index])
+                        )
+                    break
+                if self.winner and any(futures[f] is self.winner for f in done):
+                    break
+        finally:
+            # losers close their streams on their next chunk, do not wait for them
+            executor.shutdown(wait=False, cancel_futures=True)
+        return self.winner
@@ -0,0 +1,96 @@
+import hashlib
+import re
+
+from history import summarize_code
+
+FENCE = re.compile(r"(```[\w-]*\n)(.*?)(```)", re.DOTALL)
+CODE_REF = re.compile(r"\x00code:([0-9a-f]{64})\x00")
+REF_FENCE = re.compile(r"```([\w-]*)\n\x00code:([0-9a-f]{64})\x00```")
+
+
+class ChatLog:
+    """
+    Session chat history with every fenced code body stored once per content hash.
+
+    Messages keep a reference in place of each code body. Once a message is older
+    than the last `keep_code_turns` prompts its code is collapsed to the same
+    one-line summary the LLM history uses, except for the current artifact, so
+    memory stays bounded however long the session runs.
+    """
+
+    def __init__(self, keep_code_turns: int = 3):
+        self.keep_code_turns = keep_code_turns
+        self.messages: list[dict] = []
+        self.bodies: dict[str, str] = {}
+        self._collapsed = 0  # messages before this index are already collapsed
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def _intern(self, match: re.Match) -> str:
+        body = match.group(2)
+        digest = hashlib.sha256(body.encode()).hexdigest()
+        self.bodies.setdefault(digest, body)
+        return f"{match.group(1)}\x00code:{digest}\x00{match.group(3)}"
+
+    def append(self, message: dict):
+        content = FENCE.sub(self._intern, message["content"])
+        self.messages.append({**message, "content": content})
+        self._collapse()
+
+    def expand(self, message: dict) -> str:
+        return CODE_REF.sub(
+            lambda match: self.bodies[match.group(1)], message["content"]
+        )
+
+    def history(self) -> list[dict]:
+        return [
+            {**message, "content": self.expand(message)} for message in self.messages
+        ]
+
+    def _collapse(self):
+        prompts = [
+            index
+            for index in range(self._collapsed, len(self.messages))
+            if self.messages[index]["role"] == "user"
+        ]
+        if len(prompts) <= self.keep_code_turns:
+            return
+        cutoff = prompts[-self.keep_code_turns]
+        current = next(
+            (
+                refs[-1]
+                for message in reversed(self.messages)
+                if (refs := CODE_REF.findall(message["content"]))
+            ),
+            None,
+        )
+
+        def summarize(match: re.Match) -> str:
+            if match.group(2) == current:
+                return match.group(0)
+            return summarize_code(self.bodies[match.group(2)].strip(), match.group(1))
+
+        for index in range(self._collapsed, cutoff):
+            message = self.messages[index]
+            self.messages[index] = {
+                **message,
+                "content": REF_FENCE.sub(summarize, message["content"]),
+            }
+        # a message still holding the current artifact is revisited on the next collapse
+        self._collapsed = next(
+            (
+                index
+                for index in range(self._collapsed, cutoff)
+                if CODE_REF.search(self.messages[index]["content"])
+            ),
+            cutoff,
+        )
+
+        referenced = {
+            digest
+            for message in self.messages
+            for digest in CODE_REF.findall(message["content"])
+        }
+        for digest in self.bodies.keys() - referenced:
+            del self.bodies[digest]
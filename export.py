@@ -0,0 +1,108 @@
+import fnmatch
+import io
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from typing import Iterable, Iterator
+
+from docker.models.containers import Container
+
+export_formats = {
+    "tar.gz": "application/gzip",
+    "zip": "application/zip",
+    "tar": "application/x-tar",
+}
+
+default_excludes = ("node_modules", ".vite", "__pycache__")
+
+ZIP_EPOCH = 315619200  # 1980-01-02 UTC
+
+
+class ChunkReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks, buffering at most one chunk."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._buffer = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def _is_excluded(
+    name: str, excludes: Iterable[str], includes: Iterable[str] | None
+) -> bool:
+    parts = name.split("/")
+    if any(fnmatch.fnmatch(part, pattern) for part in parts for pattern in excludes):
+        return True
+    if includes:
+        return not any(
+            fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(name, f"{pattern}/*")
+            for pattern in includes
+        )
+    return False
+
+
+def _write_member(archive, member: tarfile.TarInfo, source, export_format: str):
+    if export_format == "zip":
+        if member.isdir():
+            archive.writestr(zipfile.ZipInfo(member.name + "/"), b"")
+        elif member.isfile():
+            # zip timestamps cannot predate 1980
+            mtime = max(member.mtime, ZIP_EPOCH)
+            info = zipfile.ZipInfo(member.name, time.localtime(mtime)[:6])
+            info.external_attr = (member.mode & 0xFFFF) << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, "w") as target:
+                shutil.copyfileobj(source, target)
+        return
+    archive.addfile(member, source)
+
+
+def export_container_path(
+    container: Container,
+    path: str,
+    export_format: str = "tar.gz",
+    excludes: Iterable[str] = default_excludes,
+    includes: Iterable[str] | None = None,
+    memory_cap: int = 8 * 1024 * 1024,
+) -> tempfile.SpooledTemporaryFile:
+    """
+    Stream `path` out of the container into a filtered, optionally compressed archive.
+    Chunks flow straight from the Docker API into a spooled temp file that moves to
+    disk past `memory_cap`, so the export never holds the whole project in memory.
+    Note that `st.download_button` still copies the payload into Streamlit's media
+    file manager.
+    """
+    stream, _ = container.get_archive(path)
+    output = tempfile.SpooledTemporaryFile(max_size=memory_cap)
+
+    source = tarfile.open(fileobj=ChunkReader(stream), mode="r|")
+    if export_format == "zip":
+        archive = zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED)
+    else:
+        mode = "w|gz" if export_format == "tar.gz" else "w|"
+        archive = tarfile.open(fileobj=output, mode=mode)
+
+    with source, archive:
+        for member in source:
+            if _is_excluded(member.name, excludes, includes):
+                continue
+            fileobj = source.extractfile(member) if member.isfile() else None
+            _write_member(archive, member, fileobj, export_format)
+
+    output.seek(0)
+    return output
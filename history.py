@@ -0,0 +1,116 @@
+import hashlib
+import re
+
+from pydantic import BaseModel, Field
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators added by chat templates
+
+
+class TokenReport(BaseModel):
+    system_tokens: int = Field(description="Estimated tokens in the system prompt.")
+    history_tokens: int = Field(
+        description="Estimated tokens in the chat history sent."
+    )
+    prompt_tokens: int = Field(description="Estimated tokens in the new user prompt.")
+    original_history_tokens: int = Field(
+        description="Estimated tokens the uncompacted history would have cost."
+    )
+    dropped_messages: int = Field(
+        default=0, description="Oldest messages dropped to stay within the budget."
+    )
+
+    @property
+    def total_tokens(self) -> int:
+        return self.system_tokens + self.history_tokens + self.prompt_tokens
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token holds well enough for English prose and code on
+    # llama and gemini tokenizers, and costs nothing compared to a real tokenizer
+    return (len(text) + 3) // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+def _messages_tokens(messages: list[dict]) -> int:
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+
+def _fence_pattern(code_block: str) -> re.Pattern:
+    return re.compile(rf"```{re.escape(code_block)}\s*(.*?)\s*```", re.DOTALL)
+
+
+def summarize_code(code: str, code_block: str) -> str:
+    digest = hashlib.sha256(code.encode()).hexdigest()[:12]
+    lines = code.count("\n") + 1
+    return (
+        f"[earlier {code_block} revision omitted: {lines} lines, sha256:{digest},"
+        " superseded by the latest code]"
+    )
+
+
+def _summarize_code(match: re.Match, code_block: str) -> str:
+    return summarize_code(match.group(1), code_block)
+
+
+def compact_history(
+    messages: list[dict], code_block: str, budget: int
+) -> tuple[list[dict], int]:
+    """
+    Keep the latest artifact code verbatim and collapse earlier revisions to a
+    one-line summary, then drop the oldest turns until the history fits `budget`.
+    Returns the compacted messages and the number of messages dropped.
+    """
+    pattern = _fence_pattern(code_block)
+    latest_code_index = next(
+        (
+            index
+            for index in range(len(messages) - 1, -1, -1)
+            if messages[index]["role"] == "assistant"
+            and pattern.search(messages[index]["content"])
+        ),
+        None,
+    )
+
+    compacted = []
+    for index, message in enumerate(messages):
+        if message["role"] == "assistant" and index != latest_code_index:
+            content = pattern.sub(
+                lambda match: _summarize_code(match, code_block), message["content"]
+            )
+            message = {**message, "content": content}
+        compacted.append(message)
+
+    dropped = 0
+    protected = latest_code_index if latest_code_index is not None else len(compacted)
+    while compacted and _messages_tokens(compacted) > budget:
+        # drop the oldest turn but never the message holding the current artifact
+        if protected - dropped <= 0:
+            break
+        compacted.pop(0)
+        dropped += 1
+    return compacted, dropped
+
+
+def build_messages(
+    system_prompt: str,
+    chat_history: list[dict],
+    prompt: str,
+    code_block: str,
+    budget: int,
+) -> tuple[list[dict], TokenReport]:
+    system_tokens = estimate_tokens(system_prompt)
+    prompt_tokens = estimate_tokens(prompt)
+    history_budget = max(budget - system_tokens - prompt_tokens, 0)
+    history, dropped = compact_history(chat_history, code_block, history_budget)
+    report = TokenReport(
+        system_tokens=system_tokens,
+        history_tokens=_messages_tokens(history),
+        prompt_tokens=prompt_tokens,
+        original_history_tokens=_messages_tokens(chat_history),
+        dropped_messages=dropped,
+    )
+    messages = (
+        [{"role": "system", "content": system_prompt}]
+        + history
+        + [{"role": "user", "content": prompt}]
+    )
+    return messages, report
@@ -85,13 +85,22 @@ unified_iframe_html = """
         const fullscreenButton = document.getElementById('fullscreen-button');
 
         // Set the initial URL in the address bar
-        addressDisplay.textContent = iframe.src;
+        addressDisplay.textContent = iframe.src || 'about:srcdoc (inline preview)';
 
         // Update the address bar when the iframe URL changes
         iframe.addEventListener('load', function() {{
-            addressDisplay.textContent = iframe.contentWindow.location.href;
+            try {{
+                addressDisplay.textContent = iframe.contentWindow.location.href;
+            }} catch (e) {{
+                // cross-origin (inline previews run without same-origin), keep the initial address
+            }}
         }});
 
+        // Inline previews have no address to open, and a blob URL would run them unsandboxed
+        if (iframe.hasAttribute('srcdoc')) {{
+            openButton.style.display = 'none';
+        }}
+
         // Open button functionality
         openButton.addEventListener('click', function() {{
             window.open(addressDisplay.textContent, '_blank');
@@ -99,7 +108,11 @@ unified_iframe_html = """
 
         // Refresh button functionality
         refreshButton.addEventListener('click', function() {{
-            iframe.src = iframe.src; // Reload the iframe content
+            if (iframe.hasAttribute('srcdoc')) {{
+                iframe.srcdoc = iframe.srcdoc;
+            }} else {{
+                iframe.src = iframe.src; // Reload the iframe content
+            }}
         }});
 
         // Fullscreen button functionality
@@ -116,3 +129,10 @@ unified_iframe_html = """
 </body>
 </html>
 """
+
+# Static and SVG artifacts are self-contained, so they can skip the sandbox
+# container and render straight from `srcdoc`. Same-origin is dropped so the
+# artifact cannot reach into the Streamlit page.
+inline_iframe_html = unified_iframe_html.replace(
+    'src="{src}"', 'srcdoc="{srcdoc}"'
+).replace("allow-same-origin ", "")
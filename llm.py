@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+import urllib.request
+from typing import Generator
+
+import openai
+
+from models import LLMBackend
+from resources import get_llm_client, reset_llm_client
+
+_preloading: set[str] = set()
+_preloading_lock = threading.Lock()
+
+
+def stream_chat(
+    base_url: str, model: str, messages: list[dict]
+) -> Generator[str, None, None]:
+    try:
+        response = get_llm_client(base_url).chat.completions.create(
+            model=model, messages=messages, stream=True
+        )
+    except openai.APIConnectionError:
+        reset_llm_client(base_url)  # reconnect on the next call
+        raise
+    try:
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # closing early (cancelled candidate, stopped rerun) releases the connection now
+        response.close()
+
+
+def preload_model(backend: LLMBackend, timeout: float = 300) -> float:
+    """
+    Load the model through Ollama's native API and pin it for `keep_alive`.
+    A generate request without a prompt only loads the model. Returns the seconds taken.
+    """
+    native_url = backend.base_url.rstrip("/").removesuffix("/v1")
+    request = urllib.request.Request(
+        f"{native_url}/api/generate",
+        data=json.dumps(
+            {"model": backend.model, "keep_alive": backend.keep_alive}
+        ).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    started = time.monotonic()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+    return time.monotonic() - started
+
+
+def _preload_quietly(backend: LLMBackend):
+    try:
+        print(f"🔥 {backend.model} loaded in {preload_model(backend):.2f}s")
+    except OSError as e:
+        print(f"❌ Error preloading {backend.model}:", str(e))
+    finally:
+        with _preloading_lock:
+            _preloading.discard(backend.name)
+
+
+def keep_warm(backend: LLMBackend):
+    """
+    Preload or re-pin the model in the background. Chat requests through the
+    OpenAI-compatible API reset Ollama's timer to the server default, so this
+    runs again after each one. Does nothing for backends without `keep_alive`.
+    """
+    if not backend.keep_alive:
+        return
+    with _preloading_lock:
+        if backend.name in _preloading:
+            return
+        _preloading.add(backend.name)
+    threading.Thread(target=_preload_quietly, args=(backend,), daemon=True).start()
@@ -1,3 +1,6 @@
+import os
+from typing import Literal
+
 from pydantic import BaseModel, Field
 from prompts import static_webpage_prompt, streamlit_prompt, svg_prompt, vue_app_prompt
 
@@ -15,7 +18,8 @@ class ArtifactMetadata(BaseModel):
         default=None, description="The name of the Docker image for the artifact."
     )
     host_port: int | None = Field(
-        default=None, description="The host port to expose the container."
+        default=None,
+        description="A fixed host port to expose the container, leased per session when unset.",
     )
     container_port: int | None = Field(
         default=None, description="The container's internal port."
@@ -26,6 +30,25 @@ class ArtifactMetadata(BaseModel):
     file_path: str | None = Field(
         default=None, description="The file path where the artifact will be saved."
     )
+    ready_timeout: float = Field(
+        default=30.0, description="Seconds to wait for the sandbox server to answer."
+    )
+    supports_inline: bool = Field(
+        default=False,
+        description="Whether the artifact is self-contained and can render without a container.",
+    )
+    isolation: Literal["inline", "docker"] = Field(
+        default="docker",
+        description="Render inline in the page or inside a Docker sandbox.",
+    )
+    supports_build: bool = Field(
+        default=False,
+        description="Whether the artifact can be served as a production build.",
+    )
+    render_mode: Literal["dev", "build"] = Field(
+        default="dev",
+        description="Serve from the image's dev server or as a static production build.",
+    )
 
 
 artifact_selector = {
@@ -34,12 +57,12 @@ artifact_selector = {
         prompt=streamlit_prompt,
         code_block_type="python",
         container_port=8500,
-        host_port=8500,
         file_name="run.py",
         image_name="streamlit-image-artifact:latest",
+        ready_timeout=30.0,
         container_command=[
-            "streamlit",
-            "run",
+            "python",
+            "/home/runner/runner.py",
             "run.py",
             "--server.port=8500",
             "--server.address=0.0.0.0",
@@ -51,8 +74,10 @@ artifact_selector = {
         code_block_type="html",
         file_name="index.html",
         container_port=8080,
-        host_port=8080,
         image_name="static-image-artifact",
+        ready_timeout=10.0,
+        supports_inline=True,
+        isolation="inline",
     ),
     "Vue": ArtifactMetadata(
         name="vue",
@@ -60,16 +85,52 @@ artifact_selector = {
         code_block_type="vue",
         file_name="App.vue",
         container_port=3000,
-        host_port=3000,
         image_name="vue-image-artifact",
+        ready_timeout=60.0,
+        supports_build=True,
     ),
     "SVG": ArtifactMetadata(
-        name="static",  # same name as `static` to auto remove the container, since uses the same port
+        name="static",  # same name as `static` to share the session's static sandbox
         prompt=svg_prompt,
         code_block_type="html",
         file_name="index.html",
         container_port=8080,
-        host_port=8080,
         image_name="static-image-artifact",
+        ready_timeout=10.0,
+        supports_inline=True,
+        isolation="inline",
+    ),
+}
+
+
+class LLMBackend(BaseModel):
+    name: str = Field(description="The name of the backend.")
+    base_url: str = Field(description="The OpenAI-compatible API endpoint.")
+    model: str = Field(description="The model to request.")
+    context_budget: int = Field(
+        description="Token budget for system prompt, history and prompt combined."
+    )
+    keep_alive: str | None = Field(
+        default=None,
+        description="How long an Ollama backend keeps the model loaded, None if not Ollama.",
+    )
+
+
+llm_backends = {
+    "local": LLMBackend(
+        name="local",
+        base_url=os.getenv("LOCAL_LLM_BASE_URL", "http://localhost:11434/v1"),
+        model=os.getenv("LOCAL_LLM_MODEL", "llama3.2:3b"),
+        context_budget=int(os.getenv("LOCAL_CONTEXT_BUDGET", 4096)),
+        keep_alive=os.getenv("LOCAL_LLM_KEEP_ALIVE", "30m"),
+    ),
+    "remote": LLMBackend(
+        name="remote",
+        base_url=os.getenv(
+            "REMOTE_LLM_BASE_URL",
+            "https://generativelanguage.googleapis.com/v1beta/openai/",
+        ),
+        model=os.getenv("REMOTE_LLM_MODEL", "gemini-2.0-flash"),
+        context_budget=int(os.getenv("REMOTE_CONTEXT_BUDGET", 32768)),
     ),
 }
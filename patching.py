@@ -0,0 +1,120 @@
+import re
+
+from pydantic import BaseModel, Field
+
+from streaming import extract_code_block
+
+SEARCH_REPLACE = re.compile(
+    r"^<{5,9} SEARCH[^\n]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} REPLACE[^\n]*$",
+    re.MULTILINE | re.DOTALL,
+)
+DIFF_FENCE = re.compile(r"```diff[^\n]*\n(.*?)^\s*```", re.MULTILINE | re.DOTALL)
+
+
+class PatchError(Exception):
+    pass
+
+
+class Edit(BaseModel):
+    search: str = Field(description="Exact text to find in the current artifact.")
+    replace: str = Field(description="Text to put in its place.")
+
+
+def parse_search_replace(response: str) -> list[Edit]:
+    return [
+        Edit(search=match.group(1), replace=match.group(2))
+        for match in SEARCH_REPLACE.finditer(response)
+    ]
+
+
+def parse_unified_diff(response: str) -> list[Edit]:
+    """Turn each diff hunk into an edit; hunk line numbers are ignored, models get them wrong."""
+    edits = []
+    for block in DIFF_FENCE.findall(response):
+        old, new = [], []
+        for line in block.splitlines(keepends=True) + ["@@"]:
+            if line.startswith(("---", "+++")):
+                continue
+            if line.startswith("@@"):
+                if old or new:
+                    edits.append(Edit(search="".join(old), replace="".join(new)))
+                old, new = [], []
+            elif line.startswith("-"):
+                old.append(line[1:])
+            elif line.startswith("+"):
+                new.append(line[1:])
+            else:
+                # context, including blank lines the model dropped the leading space from
+                old.append(line[1:] if line.startswith(" ") else line)
+                new.append(line[1:] if line.startswith(" ") else line)
+    return edits
+
+
+def _find_lines(code: str, search: str) -> list[tuple[int, int]]:
+    # fallback for edits whose only difference is trailing whitespace
+    lines = code.splitlines(keepends=True)
+    wanted = [line.rstrip() for line in search.splitlines()]
+    spans = []
+    for start in range(len(lines) - len(wanted) + 1 if wanted else 0):
+        if all(
+            lines[start + offset].rstrip() == line for offset, line in enumerate(wanted)
+        ):
+            begin = sum(len(line) for line in lines[:start])
+            end = begin + sum(len(line) for line in lines[start : start + len(wanted)])
+            spans.append((begin, end))
+    return spans
+
+
+def apply_edits(code: str, edits: list[Edit]) -> str:
+    for index, edit in enumerate(edits, start=1):
+        if not edit.search.strip():
+            raise PatchError(f"Edit {index} has an empty search block.")
+        first_line = edit.search.strip().splitlines()[0]
+        # an ambiguous edit could land anywhere, refuse it like one that does not match
+        if (matches := code.count(edit.search)) == 1:
+            position = code.find(edit.search)
+            code = code[:position] + edit.replace + code[position + len(edit.search) :]
+            continue
+        spans = _find_lines(code, edit.search) if not matches else []
+        if matches > 1 or len(spans) > 1:
+            raise PatchError(
+                f"Edit {index} matches {max(matches, len(spans))} places"
+                f" in the current code: {first_line!r}"
+            )
+        if not spans:
+            raise PatchError(
+                f"Edit {index} does not match the current code: {first_line!r}"
+            )
+        span = spans[0]
+        replace = edit.replace
+        if code[span[1] - 1 : span[1]] == "\n" and not replace.endswith("\n"):
+            replace += "\n"
+        code = code[: span[0]] + replace + code[span[1] :]
+    return code
+
+
+def apply_response(code: str, response: str, code_block: str) -> tuple[str, int]:
+    """
+    Apply the edits in a follow-up response to the current artifact. A response
+    carrying a complete code block instead is taken as is. Returns the new code
+    and the number of edits applied, raises PatchError if neither is usable.
+    """
+    edits = parse_search_replace(response) or parse_unified_diff(response)
+    if edits:
+        return apply_edits(code, edits), len(edits)
+    full_code = extract_code_block(response, code_block)
+    if full_code:
+        return full_code, 0
+    raise PatchError("The response contains no edits and no complete code block.")
+
+
+def with_full_code(response: str, code: str, code_block: str) -> str:
+    """
+    Replace the edits in a response with the patched file, so the chat history
+    keeps carrying the current artifact for the next turn.
+    """
+    prose = DIFF_FENCE.sub("", SEARCH_REPLACE.sub("", response))
+    prose = re.sub(rf"```{re.escape(code_block)}\s.*?```", "", prose, flags=re.DOTALL)
+    prose = re.sub(r"```[\w-]*\s*```", "", prose)  # fences left empty by the removal
+    prose = re.sub(r"\n{3,}", "\n\n", prose).strip()
+    return f"{prose}\n\n```{code_block}\n{code}\n```".lstrip()
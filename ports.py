@@ -0,0 +1,50 @@
+import socket
+import threading
+
+
+class PortExhaustedError(Exception):
+    pass
+
+
+class PortAllocator:
+    """Hands out host ports from a fixed range, leased to an owner until released."""
+
+    def __init__(self, start: int = 20000, end: int = 20999, probe: bool = True):
+        self.start = start
+        self.end = end
+        self.probe = probe
+        self._lock = threading.Lock()
+        self._leases: dict[int, str] = {}
+        self._next = start
+
+    def _is_free(self, port: int) -> bool:
+        if not self.probe:
+            return True
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind(("0.0.0.0", port))
+            except OSError:
+                return False
+        return True
+
+    def lease(self, owner: str) -> int:
+        with self._lock:
+            size = self.end - self.start + 1
+            # round robin from the last handed out port so a just-released port
+            # is not immediately reused while Docker may still be tearing it down
+            for offset in range(size):
+                port = self.start + (self._next - self.start + offset) % size
+                if port in self._leases or not self._is_free(port):
+                    continue
+                self._leases[port] = owner
+                self._next = port + 1 if port < self.end else self.start
+                return port
+        raise PortExhaustedError(f"No free host port in range {self.start}-{self.end}.")
+
+    def release(self, port: int):
+        with self._lock:
+            self._leases.pop(port, None)
+
+    def leases(self) -> dict[int, str]:
+        with self._lock:
+            return dict(self._leases)
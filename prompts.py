@@ -150,3 +150,27 @@ Output your generated App.vue file within ```vue``` tags. Include only the code
 
 Remember, your task is to generate a single, beautiful, and functional Vue application file based on the given description, utilizing Tailwind CSS for styling and following Vue.js best practices.
 """
+
+repair_prompt = """
+The code you generated failed validation before it could be run:
+
+{error}
+
+Fix this problem and reply with the complete, corrected code in a single code block.
+"""
+
+patch_prompt = """
+Follow-up edits: once the conversation contains your code and the user asks for a change, this overrides the instruction to always provide the complete code. Reply with a short description of the change followed by one or more edit blocks in exactly this format:
+
+<<<<<<< SEARCH
+lines copied exactly from the current code
+=======
+the lines that replace them
+>>>>>>> REPLACE
+
+Each SEARCH section must match the current code character for character, including indentation, and include just enough lines to be unique. Use several small edit blocks rather than one large one. Only if the change rewrites most of the file, or you are asked for the complete code, reply with the complete code instead.
+"""
+
+full_file_prompt = """
+Reply with the complete, updated code this time, not edit blocks.
+"""
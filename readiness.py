@@ -0,0 +1,69 @@
+import time
+import urllib.error
+import urllib.request
+
+import docker.errors
+from docker.models.containers import Container
+
+
+class ReadinessError(Exception):
+    pass
+
+
+def _probe(url: str, timeout: float) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status < 500
+    except urllib.error.HTTPError as e:
+        # any answer below 5xx means the server is up and routing requests
+        return e.code < 500
+    except (urllib.error.URLError, ConnectionError, TimeoutError, OSError):
+        return False
+
+
+def _container_logs(container: Container, tail: int = 20) -> str:
+    try:
+        return container.logs(tail=tail).decode(errors="replace").strip()
+    except docker.errors.DockerException:
+        return ""
+
+
+def _check_container(container: Container | None):
+    if container is None:
+        return
+    try:
+        container.reload()
+    except docker.errors.NotFound:
+        raise ReadinessError("Sandbox container disappeared before becoming ready.")
+
+    if container.status in ("exited", "dead"):
+        logs = _container_logs(container)
+        raise ReadinessError(
+            f"Sandbox container {container.status} before becoming ready.\n{logs}"
+        )
+
+
+def wait_until_ready(
+    url: str,
+    timeout: float,
+    container: Container | None = None,
+    initial_delay: float = 0.05,
+    max_delay: float = 1.0,
+) -> float:
+    """Poll `url` with exponential backoff until it answers, returns seconds waited."""
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = initial_delay
+    while True:
+        if _probe(url, timeout=min(max_delay, timeout)):
+            return time.monotonic() - started
+
+        _check_container(container)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logs = _container_logs(container) if container else ""
+            raise ReadinessError(
+                f"Sandbox at {url} not ready after {timeout:.0f}s.\n{logs}".strip()
+            )
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
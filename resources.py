@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+import docker
+import docker.errors
+from openai import OpenAI
+
+# Process-wide clients shared by every Streamlit session and rerun. Streamlit
+# re-executes app.py on each interaction but imported modules stay loaded, so
+# these live for the life of the server process.
+
+HEALTH_CHECK_INTERVAL = float(os.getenv("RESOURCE_HEALTH_CHECK_INTERVAL", 30))
+
+# separate locks, a slow Docker health check must not hold up LLM streaming
+_docker_lock = threading.Lock()
+_llm_lock = threading.Lock()
+_docker_client: docker.DockerClient | None = None
+_docker_checked_at = 0.0
+_llm_clients: dict[str, OpenAI] = {}
+
+
+def _close_quietly(client):
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+def get_docker_client() -> docker.DockerClient:
+    """Shared keep-alive Docker client, pinged at most every HEALTH_CHECK_INTERVAL seconds."""
+    global _docker_client, _docker_checked_at
+    with _docker_lock:
+        client, checked_at = _docker_client, _docker_checked_at
+    if client is not None and time.monotonic() - checked_at < HEALTH_CHECK_INTERVAL:
+        return client
+
+    # ping and reconnect outside the lock, they can block up to the Docker timeout
+    if client is not None:
+        try:
+            client.ping()
+            with _docker_lock:
+                if _docker_client is client:
+                    _docker_checked_at = time.monotonic()
+            return client
+        except (docker.errors.DockerException, OSError) as e:
+            print("♻️ Docker client unhealthy, reconnecting:", str(e))
+
+    fresh = docker.from_env(max_pool_size=int(os.getenv("DOCKER_MAX_POOL_SIZE", 32)))
+    fresh.ping()
+    with _docker_lock:
+        if _docker_client is client:
+            _docker_client, _docker_checked_at = fresh, time.monotonic()
+            stale, current = client, fresh
+        else:
+            stale, current = fresh, _docker_client  # another thread reconnected first
+    if stale is not None:
+        _close_quietly(stale)
+    return current
+
+
+def get_llm_client(base_url: str) -> OpenAI:
+    """Shared OpenAI-compatible client per endpoint, reusing its pooled HTTP connections."""
+    with _llm_lock:
+        client = _llm_clients.get(base_url)
+        if client is None:
+            client = OpenAI(base_url=base_url)
+            _llm_clients[base_url] = client
+        return client
+
+
+def reset_llm_client(base_url: str):
+    """Drop a client after a connection error so the next call reconnects."""
+    with _llm_lock:
+        client = _llm_clients.pop(base_url, None)
+    if client is not None:
+        _close_quietly(client)
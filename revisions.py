@@ -0,0 +1,55 @@
+import time
+
+from pydantic import BaseModel, Field
+
+from models import ArtifactMetadata
+
+
+class Revision(BaseModel):
+    number: int = Field(description="1-based position in the session's history.")
+    digest: str = Field(description="Content hash of the code in the ArtifactStore.")
+    artifact_metadata: ArtifactMetadata = Field(
+        description="The artifact type, isolation and render mode it was rendered with."
+    )
+    prompt: str = Field(description="The prompt that produced the revision.")
+    created_at: float = Field(default_factory=time.time)
+
+
+class RevisionHistory:
+    """
+    Every successfully rendered artifact of a session, oldest first. Revisions only
+    hold the code's digest, the code itself lives once in the ArtifactStore, and a
+    rollback moves `current` without dropping the revisions after it.
+    """
+
+    def __init__(self, keep_warm: int = 5):
+        self.keep_warm = keep_warm
+        self.revisions: list[Revision] = []
+        self.current: int | None = None
+
+    def __len__(self) -> int:
+        return len(self.revisions)
+
+    def record(
+        self, digest: str, artifact_metadata: ArtifactMetadata, prompt: str
+    ) -> Revision:
+        latest = self.revisions[-1] if self.revisions else None
+        if latest and latest.digest == digest:
+            self.current = latest.number  # re-rendered unchanged code
+            return latest
+        revision = Revision(
+            number=len(self.revisions) + 1,
+            digest=digest,
+            artifact_metadata=artifact_metadata.model_copy(),
+            prompt=prompt,
+        )
+        self.revisions.append(revision)
+        self.current = revision.number
+        return revision
+
+    def get(self, number: int) -> Revision:
+        return self.revisions[number - 1]
+
+    def warm(self) -> list[Revision]:
+        """The latest revisions, whose code and build bundles are kept from eviction."""
+        return self.revisions[-self.keep_warm :] if self.keep_warm else []
@@ -0,0 +1,461 @@
+import io
+import tarfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
+
+import docker
+import docker.errors
+from docker.models.containers import Container
+from pydantic import BaseModel, Field
+
+from models import ArtifactMetadata, artifact_selector
+from ports import PortAllocator
+from resources import get_docker_client
+from store import ArtifactStore
+from telemetry import telemetry
+
+if TYPE_CHECKING:
+    from builds import VueBuilder
+
+CONTAINER_APP_PATH = "/home/runner/app"
+BUILDER_SESSION = "builder"  # owns the Vue sandbox production builds run in
+SANDBOX_UID = 1000  # the image's runner user, root-run images can read it regardless
+
+# Placeholder sources so a pre-started container has something valid to serve
+# before the first generated artifact is pushed in.
+placeholder_sources = {
+    "run.py": "import streamlit as st\n",
+    "index.html": "<!DOCTYPE html><html><body></body></html>\n",
+    "App.vue": "<template><div></div></template>\n",
+}
+
+
+class Sandbox(BaseModel):
+    session_id: str = Field(description="The session that owns the sandbox.")
+    image_name: str = Field(description="The Docker image backing the sandbox.")
+    container_id: str = Field(description="The ID of the running container.")
+    container_name: str = Field(description="The name of the running container.")
+    host_port: int = Field(description="The host port leased to the container.")
+    artifact_digest: str | None = Field(
+        default=None, description="Content hash of the artifact currently served."
+    )
+    target_dir: str = Field(
+        description="Directory inside the container the artifact is pushed into."
+    )
+    last_used: float = Field(
+        default_factory=time.monotonic,
+        description="Monotonic time the owning session last touched the sandbox.",
+    )
+
+
+class SandboxLimits(BaseModel):
+    cpus: float | None = Field(default=1.0, description="CPU cores per container.")
+    memory: str | None = Field(
+        default="1g", description="Memory per container, swap included."
+    )
+    pids: int | None = Field(default=256, description="Max processes per container.")
+    idle_ttl: float | None = Field(
+        default=1800, description="Seconds a sandbox may sit untouched before reaping."
+    )
+    disconnect_grace: float | None = Field(
+        default=300,
+        description="Seconds a disconnected session keeps its sandboxes to reconnect.",
+    )
+    max_live: int | None = Field(
+        default=32,
+        description="Max live sandboxes, the least recently used is evicted.",
+    )
+
+
+class SandboxOccupancy(BaseModel):
+    live: int = Field(description="Sandboxes currently running.")
+    max_live: int | None = Field(description="The configured cap, None for unbounded.")
+    by_image: dict[str, int] = Field(description="Live sandboxes per image.")
+    oldest_idle_s: float = Field(description="Idle time of the least recently used.")
+
+
+class SandboxCapacityError(Exception):
+    pass
+
+
+SandboxKey = tuple[str, str]  # (session_id, image_name)
+
+
+def pack_files(files: dict[str, str]) -> bytes:
+    """Build an in-memory tar of `files` for the Docker archive API."""
+    buffer = io.BytesIO()
+    # a fresh mtime on every push is what the dev servers' file watchers key on
+    mtime = time.time()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, content in files.items():
+            data = content.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = mtime
+            info.mode = 0o644
+            info.uid = info.gid = SANDBOX_UID
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class SandboxPool:
+    """Keeps one pre-started container per session and sandbox image and hot-swaps code into it."""
+
+    def __init__(
+        self,
+        client_factory: Callable[[], docker.DockerClient] = get_docker_client,
+        port_allocator: PortAllocator | None = None,
+        artifact_store: ArtifactStore | None = None,
+        limits: SandboxLimits | None = None,
+        builder: "VueBuilder | None" = None,
+    ):
+        self._client_factory = client_factory
+        self._ports = port_allocator or PortAllocator()
+        self._store = artifact_store
+        self.limits = limits or SandboxLimits()
+        self.builder = builder
+        self._supervisor: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._key_locks: dict[SandboxKey, threading.Lock] = {}
+        self._sandboxes: dict[SandboxKey, Sandbox] = {}
+        self._executor = ThreadPoolExecutor(thread_name_prefix="sandbox-deploy")
+
+    def _key_lock(self, key: SandboxKey) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _container_name(
+        self, session_id: str, artifact_metadata: ArtifactMetadata
+    ) -> str:
+        return f"llm-artifact-{session_id[:12]}-{artifact_metadata.name}"
+
+    def _is_healthy(self, client: docker.DockerClient, sandbox: Sandbox) -> bool:
+        try:
+            container = client.containers.get(sandbox.container_id)
+        except docker.errors.NotFound:
+            return False
+        return container.status == "running"
+
+    def _remove_container(self, client: docker.DockerClient, container_name: str):
+        try:
+            container = client.containers.get(container_name)
+            container.remove(force=True)
+        except docker.errors.NotFound:
+            pass
+
+    def _resource_limits(self) -> dict:
+        limits = {}
+        if self.limits.cpus:
+            limits["nano_cpus"] = int(self.limits.cpus * 1e9)
+        if self.limits.memory:
+            limits["mem_limit"] = limits["memswap_limit"] = self.limits.memory
+        if self.limits.pids:
+            limits["pids_limit"] = self.limits.pids
+        return limits
+
+    def _start(
+        self,
+        client: docker.DockerClient,
+        session_id: str,
+        artifact_metadata: ArtifactMetadata,
+    ) -> Sandbox:
+        container_name = self._container_name(session_id, artifact_metadata)
+        self._remove_container(client, container_name)
+        host_port = artifact_metadata.host_port or self._ports.lease(container_name)
+        try:
+            container: Container = client.containers.run(
+                image=artifact_metadata.image_name,
+                ports={str(artifact_metadata.container_port): host_port},
+                detach=True,
+                name=container_name,
+                **self._resource_limits(),
+            )
+        except docker.errors.DockerException:
+            self._ports.release(host_port)
+            raise
+        sandbox = Sandbox(
+            session_id=session_id,
+            image_name=artifact_metadata.image_name,
+            container_id=container.id,
+            container_name=container_name,
+            host_port=host_port,
+            target_dir=self._target_dir(artifact_metadata),
+        )
+        try:
+            self._push(
+                container,
+                sandbox,
+                pack_files(
+                    {
+                        artifact_metadata.file_name: placeholder_sources.get(
+                            artifact_metadata.file_name, ""
+                        )
+                    }
+                ),
+            )
+        except docker.errors.DockerException:
+            self._discard(client, sandbox)
+            raise
+        return sandbox
+
+    def _target_dir(self, artifact_metadata: ArtifactMetadata) -> str:
+        # Vue only swaps the single component, the rest of the project lives in the image.
+        if artifact_metadata.name == "vue":
+            return f"{CONTAINER_APP_PATH}/src"
+        return CONTAINER_APP_PATH
+
+    def _push(self, container: Container, sandbox: Sandbox, archive: bytes):
+        """Copy files into the running container, no host paths or bind mounts involved."""
+        if not container.put_archive(sandbox.target_dir, archive):
+            raise docker.errors.APIError(
+                f"Could not copy files into {sandbox.container_name}"
+            )
+
+    def _serving(self, artifact_metadata: ArtifactMetadata) -> ArtifactMetadata:
+        """The sandbox that serves the artifact, a static server for production builds."""
+        if artifact_metadata.render_mode != "build":
+            return artifact_metadata
+        return artifact_selector["Static"].model_copy(
+            update={
+                "name": f"{artifact_metadata.name}-build",
+                "isolation": "docker",
+                "ready_timeout": artifact_metadata.ready_timeout,
+            }
+        )
+
+    def acquire(self, session_id: str, artifact_metadata: ArtifactMetadata) -> Sandbox:
+        """Return a running sandbox for the artifact's image, recreating it only when unhealthy."""
+        artifact_metadata = self._serving(artifact_metadata)
+        key = (session_id, artifact_metadata.image_name)
+        with self._key_lock(key):
+            client = self._client_factory()
+            sandbox = self._sandboxes.get(key)
+            if sandbox and self._is_healthy(client, sandbox):
+                sandbox.last_used = time.monotonic()
+                return sandbox
+
+            if sandbox:
+                print(
+                    f"♻️ Sandbox '{sandbox.container_name}' is unhealthy, recreating."
+                )
+                self._sandboxes.pop(key)
+                self._discard(client, sandbox)
+
+            self._make_room(key)
+            sandbox = self._start(client, session_id, artifact_metadata)
+            self._sandboxes[key] = sandbox
+            telemetry.gauge("artifact_sandboxes_live", len(self._sandboxes))
+            return sandbox
+
+    def _make_room(self, key: SandboxKey):
+        """Evict least recently used sandboxes until a new one fits under `max_live`."""
+        if not self.limits.max_live:
+            return
+        while len(self._sandboxes) >= self.limits.max_live:
+            candidates = sorted(
+                (item for item in list(self._sandboxes.items()) if item[0] != key),
+                key=lambda item: item[1].last_used,
+            )
+            for victim_key, victim in candidates:
+                # skip sandboxes mid-deploy, waiting on their lock could deadlock
+                if self._evict(victim_key, blocking=False):
+                    print(
+                        f"♻️ Evicted least recently used sandbox '{victim.container_name}'."
+                    )
+                    break
+            else:
+                raise SandboxCapacityError(
+                    f"All {self.limits.max_live} sandboxes are busy, try again shortly."
+                )
+
+    def warm(
+        self, session_id: str, artifact_metadata: ArtifactMetadata
+    ) -> threading.Thread:
+        """Pre-start the sandbox in the background so the first preview skips the cold boot."""
+        thread = threading.Thread(
+            target=self._warm_quietly, args=(session_id, artifact_metadata), daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _warm_quietly(self, session_id: str, artifact_metadata: ArtifactMetadata):
+        try:
+            self.acquire(session_id, artifact_metadata)
+        except Exception as e:
+            print("❌ Error warming sandbox", str(e))
+
+    def _builder_metadata(self) -> ArtifactMetadata:
+        return artifact_selector["Vue"].model_copy(update={"isolation": "docker"})
+
+    def _builder_container(self) -> Container:
+        # a pool sandbox like any other, so limits, max_live and idle reaping apply
+        return self.container(self.acquire(BUILDER_SESSION, self._builder_metadata()))
+
+    def warm_builder(self):
+        """Pre-start the sandbox production builds run in."""
+        self.ensure_warm(BUILDER_SESSION, self._builder_metadata())
+
+    def get(
+        self, session_id: str, artifact_metadata: ArtifactMetadata
+    ) -> Sandbox | None:
+        """The session's live sandbox for the artifact, None once reaped or evicted."""
+        image_name = self._serving(artifact_metadata).image_name
+        return self._sandboxes.get((session_id, image_name))
+
+    def is_warm(self, session_id: str, artifact_metadata: ArtifactMetadata) -> bool:
+        image_name = self._serving(artifact_metadata).image_name
+        return (session_id, image_name) in self._sandboxes
+
+    def ensure_warm(self, session_id: str, artifact_metadata: ArtifactMetadata):
+        if not self.is_warm(session_id, artifact_metadata):
+            self.warm(session_id, artifact_metadata)
+
+    def container(self, sandbox: Sandbox) -> Container:
+        return self._client_factory().containers.get(sandbox.container_id)
+
+    def deploy(
+        self, session_id: str, artifact_metadata: ArtifactMetadata, code: str
+    ) -> Sandbox:
+        """Push new code into the running sandbox; the server inside reloads on change."""
+        if self._store:
+            digest = self._store.put(code, artifact_metadata.file_name).digest
+        else:
+            digest = ArtifactStore.digest(code, artifact_metadata.file_name)
+
+        tags = {"artifact_type": artifact_metadata.name, "session": session_id}
+        with telemetry.span("container_start", **tags) as span:
+            warm = self.is_warm(session_id, artifact_metadata)
+            sandbox = self.acquire(session_id, artifact_metadata)
+            span.set(warm=warm, container=sandbox.container_name)
+
+        artifact_metadata.file_path = (
+            f"{sandbox.target_dir}/{artifact_metadata.file_name}"
+        )
+        if sandbox.artifact_digest == digest:
+            return sandbox  # already serving this exact code, nothing to reload
+
+        if artifact_metadata.render_mode == "build":
+            if not self.builder:
+                raise ValueError("Production builds need a SandboxPool with a builder")
+            with telemetry.span("build", **tags) as span:
+                archive, cached = self.builder.build(
+                    code, digest, self._builder_container
+                )
+                span.set(cached=cached, bytes=len(archive))
+        else:
+            archive = pack_files({artifact_metadata.file_name: code})
+
+        with telemetry.span("file_write", **tags) as span:
+            self._push(self.container(sandbox), sandbox, archive)
+            span.set(bytes=len(archive), digest=digest[:12], delivery="archive")
+        sandbox.artifact_digest = digest
+        return sandbox
+
+    def deploy_async(
+        self, session_id: str, artifact_metadata: ArtifactMetadata, code: str
+    ) -> Future:
+        """Deploy in the background so the sandbox reloads while the LLM is still streaming."""
+        return self._executor.submit(self.deploy, session_id, artifact_metadata, code)
+
+    def _discard(self, client: docker.DockerClient, sandbox: Sandbox):
+        try:
+            self._remove_container(client, sandbox.container_name)
+        finally:
+            self._ports.release(sandbox.host_port)
+
+    def _evict(self, key: SandboxKey, blocking: bool = True) -> bool:
+        lock = self._key_lock(key)
+        if not lock.acquire(blocking=blocking):
+            return False
+        try:
+            sandbox = self._sandboxes.pop(key, None)
+            if sandbox:
+                self._discard(self._client_factory(), sandbox)
+        finally:
+            # the lock stays in _key_locks, a thread may already be waiting on it and
+            # a fresh lock for the same key would let two _start calls race
+            lock.release()
+        telemetry.gauge("artifact_sandboxes_live", len(self._sandboxes))
+        return sandbox is not None
+
+    def release(self, session_id: str):
+        """Tear down every sandbox owned by the session and return its port leases."""
+        keys = [key for key in list(self._sandboxes) if key[0] == session_id]
+        for key in keys:
+            self._evict(key)
+
+    def touch(self, session_id: str):
+        """Mark the session's sandboxes as in use, called on every rerun of its page."""
+        now = time.monotonic()
+        for (owner, _), sandbox in list(self._sandboxes.items()):
+            if owner == session_id:
+                sandbox.last_used = now
+
+    def sessions(self) -> set[str]:
+        return {session_id for session_id, _ in list(self._sandboxes)}
+
+    def reap(self, is_active: Callable[[str], bool]) -> list[str]:
+        """
+        Release sandboxes of sessions that have ended (closed tabs, expired websockets).
+        A session without a websocket may only be reconnecting after a network blip
+        or a sleeping laptop, so it is reaped once untouched for `disconnect_grace`.
+        """
+        cutoff = time.monotonic() - (self.limits.disconnect_grace or 0)
+        last_used: dict[str, float] = {}
+        for (owner, _), sandbox in list(self._sandboxes.items()):
+            last_used[owner] = max(last_used.get(owner, 0.0), sandbox.last_used)
+        ended = [
+            session_id
+            for session_id, used in last_used.items()
+            if session_id != BUILDER_SESSION
+            and used < cutoff
+            and not is_active(session_id)
+        ]
+        for session_id in ended:
+            self.release(session_id)
+        return ended
+
+    def reap_idle(self) -> list[str]:
+        """Release sandboxes untouched for longer than `idle_ttl`, e.g. abandoned tabs."""
+        if not self.limits.idle_ttl:
+            return []
+        cutoff = time.monotonic() - self.limits.idle_ttl
+        reaped = []
+        for key, sandbox in list(self._sandboxes.items()):
+            if sandbox.last_used < cutoff and self._evict(key, blocking=False):
+                reaped.append(sandbox.container_name)
+        return reaped
+
+    def start_supervisor(self, interval: float = 60):
+        """Reap idle sandboxes from a background thread, once per pool."""
+        with self._lock:
+            if self._supervisor:
+                return
+            self._supervisor = threading.Thread(
+                target=self._supervise, args=(interval,), daemon=True
+            )
+        self._supervisor.start()
+
+    def _supervise(self, interval: float):
+        while True:
+            time.sleep(interval)
+            try:
+                if reaped := self.reap_idle():
+                    print(f"🧹 Reaped {len(reaped)} idle sandboxes:", ", ".join(reaped))
+            except Exception as e:
+                print("❌ Error reaping idle sandboxes", str(e))
+
+    def occupancy(self) -> SandboxOccupancy:
+        sandboxes = list(self._sandboxes.values())
+        by_image: dict[str, int] = {}
+        for sandbox in sandboxes:
+            by_image[sandbox.image_name] = by_image.get(sandbox.image_name, 0) + 1
+        now = time.monotonic()
+        return SandboxOccupancy(
+            live=len(sandboxes),
+            max_live=self.limits.max_live,
+            by_image=by_image,
+            oldest_idle_s=max((now - s.last_used for s in sandboxes), default=0.0),
+        )
@@ -0,0 +1,76 @@
+"""
+Sandbox entrypoint that imports the heavy allowed libraries once, then forks
+the Streamlit server from the warm interpreter.
+
+Sandboxes are started before the generated code arrives, so the import cost is
+paid while the LLM is still streaming instead of on the first render. If the
+server dies (e.g. the artifact called os._exit), the parent forks a fresh one
+from the same warm state instead of the container exiting.
+
+    python runner.py run.py --server.port=8500 --server.address=0.0.0.0
+"""
+
+import importlib
+import os
+import signal
+import sys
+import time
+
+PRELOAD_MODULES = os.getenv(
+    "PRELOAD_MODULES",
+    "streamlit,numpy,pandas,matplotlib.pyplot,seaborn,plotly.express,PIL.Image,"
+    "requests,bs4",
+)
+
+child_pid = 0
+
+
+def preload():
+    os.environ.setdefault("MPLBACKEND", "Agg")  # no display in the container
+    started = time.perf_counter()
+    loaded = []
+    for name in filter(None, (m.strip() for m in PRELOAD_MODULES.split(","))):
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception as e:
+            print(f"❌ Could not preload {name}: {e}", file=sys.stderr)
+    elapsed = time.perf_counter() - started
+    print(f"🔥 Preloaded {', '.join(loaded)} in {elapsed:.2f}s", flush=True)
+
+
+def serve(args: list[str]):
+    from streamlit.web import cli
+
+    sys.argv = ["streamlit", "run", *args]
+    cli.main()
+
+
+def forward(signum, frame):
+    # PID 1 in the container, pass `docker stop` on to the server and exit with it
+    if child_pid:
+        os.kill(child_pid, signum)
+    sys.exit(0)
+
+
+def main():
+    global child_pid
+    preload()
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    while True:
+        child_pid = os.fork()
+        if child_pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                serve(sys.argv[1:])
+            finally:
+                os._exit(1)
+        _, status = os.waitpid(child_pid, 0)
+        print(f"♻️ Streamlit exited ({status}), forking a new server", flush=True)
+        time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,4 +4,8 @@ import tailwindcss from "@tailwindcss/vite";
 
 export default defineConfig({
   plugins: [vue(), tailwindcss()],
+  server: {
+    // App.vue is replaced from the daemon side (put_archive), poll rather than trust inotify
+    watch: { usePolling: true, interval: 200 },
+  },
 });
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from pydantic import BaseModel, Field
+
+
+class StoredArtifact(BaseModel):
+    digest: str = Field(description="SHA-256 of the file name and generated code.")
+    file_name: str = Field(description="The file name the artifact is served as.")
+    path: str = Field(description="The path of the stored file.")
+    size: int = Field(description="Size of the stored file in bytes.")
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for generated artifacts. Identical code is written
+    once, and entries are evicted oldest-first past `max_bytes` or `max_age`.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age: float = 7 * 86400,
+        gc_interval: float = 300,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.gc_interval = gc_interval
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def digest(code: str, file_name: str) -> str:
+        return hashlib.sha256(f"{file_name}\0{code}".encode()).hexdigest()
+
+    def _dir(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def get(self, digest: str) -> StoredArtifact | None:
+        directory = self._dir(digest)
+        try:
+            (file_name,) = os.listdir(directory)
+        except (FileNotFoundError, ValueError):
+            return None
+        path = os.path.join(directory, file_name)
+        os.utime(directory)  # directory mtime is the last-used clock for eviction
+        return StoredArtifact(
+            digest=digest, file_name=file_name, path=path, size=os.path.getsize(path)
+        )
+
+    def read(self, digest: str) -> str | None:
+        data = self.read_bytes(digest)
+        return data.decode() if data is not None else None
+
+    def read_bytes(self, digest: str) -> bytes | None:
+        artifact = self.get(digest)
+        if artifact is None:
+            return None
+        with open(artifact.path, "rb") as f:
+            return f.read()
+
+    def put(self, code: str, file_name: str) -> StoredArtifact:
+        return self.put_bytes(self.digest(code, file_name), code.encode(), file_name)
+
+    def put_bytes(self, digest: str, data: bytes, file_name: str) -> StoredArtifact:
+        """Store derived data, such as a build of an artifact, under a caller-chosen digest."""
+        if artifact := self.get(digest):
+            return artifact  # dedup, identical code is never rewritten
+
+        directory = self._dir(digest)
+        os.makedirs(os.path.dirname(directory), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=os.path.dirname(directory))
+        with open(os.path.join(staging, file_name), "wb") as f:
+            f.write(data)
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)  # another writer stored it first
+
+        self.maybe_gc(keep=digest)
+        return self.get(digest)
+
+    def maybe_gc(self, keep: str | None = None):
+        if time.monotonic() - self._last_gc >= self.gc_interval:
+            self.gc(keep=keep)
+
+    def gc(self, keep: str | None = None) -> int:
+        with self._lock:
+            self._last_gc = time.monotonic()
+            entries = []
+            for shard in os.scandir(self.root):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.startswith(".") or entry.name == keep:
+                        continue
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            now = time.time()
+            evicted = 0
+            for mtime, size, path in entries:
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                evicted += 1
+            return evicted
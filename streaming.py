@@ -0,0 +1,111 @@
+from typing import Callable, Generator, Iterable
+
+FENCE = "```"
+
+
+class FenceParser:
+    """
+    Incrementally extracts fenced code blocks of one language from a token stream.
+
+    Tokens are consumed line by line, only the unfinished tail line is kept between
+    feeds so nothing is rescanned. `on_open` fires when the opening fence for
+    `code_block` is seen and `on_block` fires with the code as soon as its closing
+    fence arrives, without waiting for the rest of the response.
+    """
+
+    def __init__(
+        self,
+        code_block: str,
+        on_open: Callable[[], None] | None = None,
+        on_block: Callable[[str], None] | None = None,
+    ):
+        self.code_block = code_block
+        self.on_open = on_open
+        self.on_block = on_block
+        self.blocks: list[str] = []
+        self.unterminated = False
+        self._pending = ""
+        self._state = "prose"  # prose | code | foreign
+        self._body: list[str] = []
+
+    @property
+    def code(self) -> str | None:
+        return self.blocks[0] if self.blocks else None
+
+    def feed(self, token: str):
+        data = self._pending + token
+        start = 0
+        while (end := data.find("\n", start)) != -1:
+            self._line(data[start:end])
+            start = end + 1
+        self._pending = data[start:]
+        if self._state == "code" and self._pending.lstrip().startswith(FENCE):
+            # closing fence is complete, fire now instead of waiting for its newline
+            self._line(self._pending)
+            self._pending = ""
+
+    def close(self):
+        if self._pending:
+            self._line(self._pending)
+            self._pending = ""
+        if self._state == "code":
+            # the model stopped mid-block, never launch half an artifact
+            self.unterminated = True
+            self._state = "prose"
+            self._body = []
+
+    def wrap(self, stream: Iterable[str]) -> Generator[str, None, None]:
+        for token in stream:
+            self.feed(token)
+            yield token
+        self.close()
+
+    def _line(self, line: str):
+        stripped = line.strip()
+        if self._state == "prose":
+            if not stripped.startswith(FENCE):
+                return
+            info = stripped[len(FENCE) :]
+            if info.startswith(self.code_block) and (
+                info[len(self.code_block) :][:1] in ("", " ", "\t")
+            ):
+                self._state = "code"
+                self._body = []
+                if self.on_open:
+                    self.on_open()
+            elif info.endswith(FENCE) and len(stripped) > len(FENCE):
+                return  # inline ```code``` span on one line
+            else:
+                self._state = "foreign"
+            return
+
+        if self._state == "foreign":
+            if stripped.startswith(FENCE):
+                self._state = "prose"
+            return
+
+        # inside the requested block, the closing fence may trail the last code line
+        if stripped.endswith(FENCE):
+            tail = line[: line.rfind(FENCE)]
+            if tail.strip():
+                self._body.append(tail)
+            self._finish()
+        else:
+            self._body.append(line)
+
+    def _finish(self):
+        self._state = "prose"
+        code = "\n".join(self._body).strip()
+        self._body = []
+        if not code:
+            return
+        self.blocks.append(code)
+        if self.on_block and len(self.blocks) == 1:
+            self.on_block(code)
+
+
+def extract_code_block(text: str, code_block: str) -> str | None:
+    parser = FenceParser(code_block)
+    parser.feed(text)
+    parser.close()
+    return parser.code
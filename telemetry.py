@@ -0,0 +1,237 @@
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Generator, Iterable
+
+# Seconds, tuned for the pipeline: sub-ms extraction up to minute-long Vue boots.
+BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Session ids only go to the trace log, as metric labels they would explode cardinality.
+METRIC_LABELS = ("stage", "artifact_type", "model")
+
+
+class Span:
+    def __init__(self, name: str, tags: dict):
+        self.name = name
+        self.tags = tags
+        self.attributes: dict = {}
+        self.started = time.perf_counter()
+        self.error: str | None = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_noop_span = _NoopSpan()
+
+
+class Telemetry:
+    def __init__(
+        self,
+        enabled: bool = False,
+        trace_path: str | None = None,
+        trace_max_bytes: int = 10 * 1024 * 1024,
+        trace_backups: int = 5,
+    ):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # (name, labels) -> [bucket counts, sum, count]
+        self._histograms: dict[tuple, list] = {}
+        self._counters: dict[tuple, float] = {}
+        self._gauges: dict[tuple, float] = {}
+        self._server: ThreadingHTTPServer | None = None
+        self._trace_log: logging.Logger | None = None
+        if enabled and trace_path:
+            os.makedirs(os.path.dirname(os.path.abspath(trace_path)), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                trace_path, maxBytes=trace_max_bytes, backupCount=trace_backups
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._trace_log = logging.getLogger("llm_artifact.trace")
+            self._trace_log.setLevel(logging.INFO)
+            self._trace_log.propagate = False
+            self._trace_log.addHandler(handler)
+
+    @staticmethod
+    def _labels(tags: dict) -> tuple:
+        return tuple((key, str(tags.get(key, ""))) for key in METRIC_LABELS)
+
+    def observe(self, name: str, seconds: float, **tags):
+        if not self.enabled:
+            return
+        key = (name, self._labels(tags))
+        with self._lock:
+            histogram = self._histograms.setdefault(key, [[0] * len(BUCKETS), 0.0, 0])
+            for index, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def inc(self, name: str, value: float = 1, **tags):
+        if not self.enabled:
+            return
+        key = (name, self._labels(tags))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **tags):
+        if not self.enabled:
+            return
+        key = (name, self._labels(tags))
+        with self._lock:
+            self._gauges[key] = value
+
+    def _emit(self, span: Span, duration: float):
+        self.observe("artifact_stage_seconds", duration, stage=span.name, **span.tags)
+        if span.error:
+            self.inc("artifact_stage_errors_total", stage=span.name, **span.tags)
+        if self._trace_log:
+            record = {
+                "ts": time.time(),
+                "span": span.name,
+                "duration_ms": round(duration * 1000, 3),
+                **span.tags,
+                **span.attributes,
+            }
+            if span.error:
+                record["error"] = span.error
+            self._trace_log.info(json.dumps(record, default=str))
+
+    def span(self, name: str, **tags):
+        # disabled telemetry hands back a shared no-op, no generator or span is created
+        if not self.enabled:
+            return _noop_span
+        return self._span(name, tags)
+
+    @contextmanager
+    def _span(self, name: str, tags: dict):
+        span = Span(name, tags)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            self._emit(span, time.perf_counter() - span.started)
+
+    def trace_stream(
+        self, stream: Iterable[str], name: str = "llm", **tags
+    ) -> Generator[str, None, None]:
+        """Pass chunks through, recording TTFT, chunk count and chunks/sec on completion."""
+        if not self.enabled:
+            yield from stream
+            return
+        span = Span(name, tags)
+        first_token_at = None
+        chunks = 0
+        try:
+            for chunk in stream:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                chunks += 1
+                yield chunk
+        except GeneratorExit:
+            span.set(cancelled=True)
+            raise
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            ended = time.perf_counter()
+            if first_token_at is not None:
+                ttft = first_token_at - span.started
+                generation = ended - first_token_at
+                span.set(
+                    ttft_ms=round(ttft * 1000, 3),
+                    chunks=chunks,
+                    chunks_per_second=(
+                        round(chunks / generation, 2) if generation else None
+                    ),
+                )
+                self.observe("artifact_llm_ttft_seconds", ttft, **tags)
+                self.inc("artifact_llm_chunks_total", chunks, **tags)
+            self._emit(span, ended - span.started)
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            histograms = {
+                k: (list(v[0]), v[1], v[2]) for k, v in self._histograms.items()
+            }
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        def fmt(labels: tuple, extra: tuple = ()) -> str:
+            pairs = [f'{k}="{v}"' for k, v in labels + extra if v != ""]
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        for name in sorted({key[0] for key in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), (buckets, total, count) in histograms.items():
+                if metric != name:
+                    continue
+                for bound, bucket_count in zip(BUCKETS, buckets):
+                    lines.append(
+                        f"{name}_bucket{fmt(labels, (('le', bound),))} {bucket_count}"
+                    )
+                lines.append(f"{name}_bucket{fmt(labels, (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{fmt(labels)} {total}")
+                lines.append(f"{name}_count{fmt(labels)} {count}")
+        for name in sorted({key[0] for key in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in counters.items():
+                if metric == name:
+                    lines.append(f"{name}{fmt(labels)} {value}")
+        for name in sorted({key[0] for key in gauges}):
+            lines.append(f"# TYPE {name} gauge")
+            for (metric, labels), value in gauges.items():
+                if metric == name:
+                    lines.append(f"{name}{fmt(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int, host: str = "0.0.0.0"):
+        """Expose /metrics in the Prometheus text format, once per process."""
+        with self._lock:
+            if self._server or not self.enabled:
+                return
+            telemetry = self
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def log_message(self, format, *args):
+                    pass
+
+                def do_GET(self):
+                    body = telemetry.render_prometheus().encode()
+                    self.send_response(200 if self.path == "/metrics" else 404)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+            self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+
+telemetry = Telemetry(
+    enabled=os.getenv("TELEMETRY_ENABLED", "0") == "1",
+    trace_path=os.getenv("TELEMETRY_TRACE_PATH", "traces/pipeline.jsonl"),
+    trace_max_bytes=int(os.getenv("TELEMETRY_TRACE_MAX_MB", 10)) * 1024 * 1024,
+)
@@ -0,0 +1,106 @@
+import pytest
+
+from patching import (
+    PatchError,
+    apply_edits,
+    apply_response,
+    parse_unified_diff,
+    with_full_code,
+    Edit,
+)
+
+code = """import streamlit as st
+
+st.title("Sales")
+st.write("total")
+"""
+
+
+def edit_block(search: str, replace: str) -> str:
+    return f"<<<<<<< SEARCH\n{search}=======\n{replace}>>>>>>> REPLACE\n"
+
+
+def test_search_replace_edit_applies():
+    response = "Renamed the title.\n\n" + edit_block(
+        'st.title("Sales")\n', 'st.title("Revenue")\n'
+    )
+    patched, edits = apply_response(code, response, "python")
+    assert edits == 1
+    assert 'st.title("Revenue")' in patched
+    assert 'st.write("total")' in patched
+
+
+def test_edits_apply_in_order():
+    response = edit_block('st.title("Sales")\n', 'st.title("A")\n') + edit_block(
+        'st.title("A")\n', 'st.title("B")\n'
+    )
+    patched, edits = apply_response(code, response, "python")
+    assert edits == 2
+    assert 'st.title("B")' in patched
+
+
+def test_edit_that_does_not_match_raises():
+    response = edit_block('st.header("Sales")\n', 'st.header("Revenue")\n')
+    with pytest.raises(PatchError, match="does not match"):
+        apply_response(code, response, "python")
+
+
+def test_edit_matching_several_places_raises():
+    repeated = code + 'st.write("total")\n'
+    response = edit_block('st.write("total")\n', 'st.write("sum")\n')
+    with pytest.raises(PatchError, match="matches 2 places"):
+        apply_response(repeated, response, "python")
+
+
+def test_trailing_whitespace_falls_back_to_line_match():
+    edits = [Edit(search='st.title("Sales")   \n', replace='st.title("Revenue")')]
+    patched = apply_edits(code, edits)
+    assert patched == code.replace('st.title("Sales")', 'st.title("Revenue")')
+
+
+def test_line_match_fallback_refuses_ambiguous_edits():
+    repeated = 'st.write("total")  \n' + code
+    edits = [Edit(search='st.write("total")\t\n', replace='st.write("sum")\n')]
+    with pytest.raises(PatchError, match="matches 2 places"):
+        apply_edits(repeated, edits)
+
+
+def test_empty_search_block_raises():
+    with pytest.raises(PatchError, match="empty search"):
+        apply_edits(code, [Edit(search="\n", replace="x\n")])
+
+
+def test_unified_diff_hunks_become_edits():
+    response = """```diff
+--- a/run.py
++++ b/run.py
+@@ -3,2 +3,2 @@
+-st.title("Sales")
++st.title("Revenue")
+ st.write("total")
+```"""
+    assert parse_unified_diff(response) == [
+        Edit(
+            search='st.title("Sales")\nst.write("total")\n',
+            replace='st.title("Revenue")\nst.write("total")\n',
+        )
+    ]
+    patched, edits = apply_response(code, response, "python")
+    assert edits == 1
+    assert 'st.title("Revenue")' in patched
+
+
+def test_full_code_block_is_taken_as_is():
+    response = "Rewrote it.\n\n```python\nimport streamlit as st\n```\n"
+    assert apply_response(code, response, "python") == ("import streamlit as st", 0)
+
+
+def test_response_without_edits_or_code_raises():
+    with pytest.raises(PatchError, match="no edits"):
+        apply_response(code, "I cannot do that.", "python")
+
+
+def test_with_full_code_replaces_edits_with_the_patched_file():
+    response = "Renamed the title.\n\n" + edit_block("a\n", "b\n")
+    history = with_full_code(response, "patched", "python")
+    assert history == "Renamed the title.\n\n```python\npatched\n```"
@@ -0,0 +1,68 @@
+from streaming import FenceParser, extract_code_block
+
+response = """Here is the app.
+
+```python
+import streamlit as st
+
+st.title("Demo")
+```
+
+It renders a title."""
+
+
+def feed_in_chunks(parser: FenceParser, text: str, size: int):
+    for start in range(0, len(text), size):
+        parser.feed(text[start : start + size])
+    parser.close()
+
+
+def test_extracts_the_requested_block():
+    assert extract_code_block(response, "python") == (
+        'import streamlit as st\n\nst.title("Demo")'
+    )
+
+
+def test_fences_split_across_tokens():
+    # every chunk size splits the fences and the info string somewhere
+    for size in range(1, 8):
+        parser = FenceParser("python")
+        feed_in_chunks(parser, response, size)
+        assert parser.code == 'import streamlit as st\n\nst.title("Demo")', size
+
+
+def test_on_block_fires_on_the_closing_fence_before_the_prose():
+    seen = []
+    parser = FenceParser(
+        "python", on_open=lambda: seen.append("open"), on_block=seen.append
+    )
+    closing = response.index("```\n\nIt")
+    parser.feed(response[: closing + 2])  # half a closing fence is not one yet
+    assert seen == ["open"]
+    parser.feed("`")
+    assert seen == ["open", 'import streamlit as st\n\nst.title("Demo")']
+
+
+def test_other_languages_are_skipped():
+    text = "```bash\npip install x\n```\n\n```python\nprint(1)\n```\n"
+    assert extract_code_block(text, "python") == "print(1)"
+
+
+def test_language_prefix_is_not_a_match():
+    assert extract_code_block("```pythonic\nx\n```\n", "python") is None
+
+
+def test_inline_fence_span_is_ignored():
+    text = "Use ```python x``` inline.\n\n```python\nprint(1)\n```"
+    assert extract_code_block(text, "python") == "print(1)"
+
+
+def test_closing_fence_on_the_last_code_line():
+    assert extract_code_block("```python\nprint(1)```", "python") == "print(1)"
+
+
+def test_unterminated_block_is_dropped():
+    parser = FenceParser("python")
+    feed_in_chunks(parser, "```python\nimport streamlit as st\nst.", 4)
+    assert parser.code is None
+    assert parser.unterminated
@@ -0,0 +1,80 @@
+from validation import validate_code, validate_html, validate_python, validate_vue
+
+vue_app = """<template>
+  <div>{{ message }}</div>
+</template>
+
+<script setup>
+const message = "Hello"
+</script>
+
+<style scoped>
+div { color: red; }
+</style>
+"""
+
+
+def test_allowed_and_stdlib_imports_pass():
+    code = "import json\nimport pandas as pd\nfrom PIL import Image\nimport streamlit"
+    assert validate_python(code) is None
+
+
+def test_disallowed_import_is_reported():
+    error = validate_python("import streamlit as st\nimport torch\n")
+    assert error == "Import of 'torch' on line 2 is not allowed."
+
+
+def test_python_syntax_error_is_reported():
+    assert validate_python("def broken(:\n").startswith("SyntaxError on line 1")
+
+
+def test_html_optional_and_void_tags_pass():
+    html = "<html><body><ul><li>one<li>two</ul><img src=x><br></body></html>"
+    assert validate_html(html) is None
+
+
+def test_html_mismatched_close_is_reported():
+    assert validate_html("<div>\n<span></div>") == (
+        "<span> opened on line 2 is closed by </div>."
+    )
+
+
+def test_html_unclosed_tag_is_reported():
+    assert validate_html("<div>\n<section>") == (
+        "<div> opened on line 1 is never closed."
+    )
+
+
+def test_html_without_elements_is_reported():
+    assert validate_html("just text") == "No HTML elements found."
+
+
+def test_vue_sfc_passes():
+    assert validate_vue(vue_app) is None
+
+
+def test_vue_template_string_in_script_is_not_a_block():
+    code = vue_app.replace('"Hello"', '"<template>"')
+    assert validate_vue(code) is None
+
+
+def test_vue_nested_template_tags_pass():
+    code = vue_app.replace(
+        "<div>{{ message }}</div>",
+        '<template v-if="message"><div>{{ message }}</div></template>',
+    )
+    assert validate_vue(code) is None
+
+
+def test_vue_unclosed_template_is_reported():
+    code = vue_app.replace("</template>\n", "")
+    assert validate_vue(code) == "Unbalanced <template> blocks: 1 opened, 0 closed."
+
+
+def test_vue_duplicate_script_setup_is_reported():
+    code = vue_app + "\n<script setup>\n</script>\n"
+    assert validate_vue(code).startswith("A Vue SFC allows at most one")
+
+
+def test_unknown_code_block_is_not_checked():
+    assert validate_code("anything", "svg") is None
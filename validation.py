@@ -0,0 +1,150 @@
+import ast
+import re
+import sys
+from html.parser import HTMLParser
+
+from prompts import streamlit_prompt
+
+# distribution names in the prompt that import under another name
+import_names = {"pillow": "PIL", "beautifulsoup4": "bs4"}
+
+
+def _allowed_python_modules() -> set[str]:
+    # the "- library" list in streamlit_prompt is the source of truth
+    listed = re.findall(r"^- ([\w-]+)\s*$", streamlit_prompt, re.MULTILINE)
+    return {import_names.get(name, name) for name in listed}
+
+
+allowed_python_modules = _allowed_python_modules()
+
+
+def validate_python(code: str) -> str | None:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return f"SyntaxError on line {e.lineno}: {e.msg}"
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules = [node.module]
+        else:
+            continue
+        for module in modules:
+            root = module.split(".")[0]
+            if (
+                root not in allowed_python_modules
+                and root not in sys.stdlib_module_names
+            ):
+                return f"Import of '{root}' on line {node.lineno} is not allowed."
+    return None
+
+
+# elements whose end tag HTML lets authors omit, or that never have one
+optional_end_tags = {
+    "html", "head", "body", "p", "li", "dt", "dd", "tr", "td", "th", "thead",
+    "tbody", "tfoot", "colgroup", "option", "optgroup", "rt", "rp",
+}  # fmt: skip
+void_tags = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "source", "track", "wbr",
+}  # fmt: skip
+
+
+class _TagBalanceParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: list[tuple[str, int]] = []
+        self.error: str | None = None
+        self.elements = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.elements += 1
+        if tag not in void_tags:
+            self.stack.append((tag, self.getpos()[0]))
+
+    def handle_startendtag(self, tag, attrs):
+        self.elements += 1  # <svg/>, <path/> are self-closing, nothing to balance
+
+    def handle_endtag(self, tag):
+        if self.error or tag in void_tags:
+            return
+        open_tags = [name for name, _ in self.stack]
+        if tag not in open_tags:
+            self.error = f"Unexpected </{tag}> on line {self.getpos()[0]}."
+            return
+        while self.stack:
+            name, line = self.stack.pop()
+            if name == tag:
+                return
+            if name not in optional_end_tags:
+                self.error = f"<{name}> opened on line {line} is closed by </{tag}>."
+                return
+
+    def unclosed(self) -> str | None:
+        for name, line in self.stack:
+            if name not in optional_end_tags:
+                return f"<{name}> opened on line {line} is never closed."
+        return None
+
+
+def validate_html(code: str) -> str | None:
+    parser = _TagBalanceParser()
+    parser.feed(code)
+    parser.close()
+    if parser.error:
+        return parser.error
+    if not parser.elements:
+        return "No HTML elements found."
+    return parser.unclosed()
+
+
+def validate_vue(code: str) -> str | None:
+    blocks = re.findall(r"^<(template|script|style)\b([^>]*)>", code, re.MULTILINE)
+    names = [name for name, _ in blocks]
+    if names.count("template") != 1:
+        return "A Vue SFC needs exactly one top-level <template> block."
+    setup_scripts = sum(
+        1 for name, attrs in blocks if name == "script" and "setup" in attrs
+    )
+    if setup_scripts > 1 or names.count("script") - setup_scripts > 1:
+        return "A Vue SFC allows at most one <script> and one <script setup> block."
+    for name in ("script", "style"):
+        opened = names.count(name)
+        closed = len(re.findall(rf"^</{name}\s*>", code, re.MULTILINE))
+        if opened != closed:
+            return f"Unbalanced <{name}> blocks: {opened} opened, {closed} closed."
+
+    # script and style bodies are not markup, a "<template>" string in them must not count
+    markup = re.sub(
+        r"^<(script|style)\b[^>]*>.*?^</\1\s*>",
+        "",
+        code,
+        flags=re.MULTILINE | re.DOTALL,
+    )
+    # the template may contain nested <template> tags, compare the outermost ones
+    opened = len(re.findall(r"<template\b", markup))
+    closed = len(re.findall(r"</template\s*>", markup))
+    if opened != closed:
+        return f"Unbalanced <template> blocks: {opened} opened, {closed} closed."
+
+    template = re.search(
+        r"^<template\b[^>]*>(.*)^</template>", markup, re.MULTILINE | re.DOTALL
+    )
+    if not template:
+        return "The <template> block is not closed at the top level."
+    return validate_html(template.group(1))
+
+
+validators = {
+    "python": validate_python,
+    "html": validate_html,
+    "vue": validate_vue,
+}
+
+
+def validate_code(code: str, code_block: str) -> str | None:
+    """Return a short error for code that would not run in its sandbox, None if it looks fine."""
+    validator = validators.get(code_block)
+    return validator(code) if validator else None